@@ -0,0 +1,384 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from column_types import entity_key, singular_names
+from config_manager import ConfigManager
+from parallel_loader import DEFAULT_WORKERS
+from zip_source import MODULES_FILE, SCHEMA_FILE
+
+# Real tenant export whose files and entity definitions shape the synthetic tenant
+REAL_DATA_DIR = Path(__file__).parent / "config.json"
+
+# Records per file at scale 1 when there is no real file to copy the size from
+DEFAULT_RECORDS = 100
+
+# Items generated per nested list, e.g. IBPLRules of an action button
+DEFAULT_FANOUT = 3
+
+# Offset added to integer ids of every further copy of the real records
+ID_STRIDE = 10 ** 8
+
+# Ingestion modes to compare, as import_tenant arguments
+MODES: Dict[str, Dict[str, Any]] = {
+    "sequential": {"workers": 1},
+    "parallel": {"workers": DEFAULT_WORKERS},
+    "two-pass": {"workers": 1, "two_pass": True},
+    "safe": {"workers": 1, "profile": "safe"},
+}
+
+
+class TenantGenerator:
+    """Generate a synthetic tenant ZIP shaped like the real export, scaled by a factor."""
+
+    def __init__(self, config_manager: ConfigManager, scale: float = 1, fanout: int = DEFAULT_FANOUT,
+                 nesting: int = 0, seed: int = 0, data_dir: Path = REAL_DATA_DIR):
+        self.config_manager = config_manager
+        self.scale = scale
+        self.fanout = fanout
+        self.nesting = nesting
+        self.data_dir = data_dir
+        self.random = random.Random(seed)
+        self.entities = self._load_entities()
+        self.module_ids = [module["ModuleId"] for module in self._load_real(MODULES_FILE) or []] or [None]
+
+    def _load_entities(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Map entity names from _schema.json to their properties by name."""
+        schema_path = self.data_dir / SCHEMA_FILE
+        if not schema_path.exists():
+            return {}
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        return {entity_key(entity["Name"]): {prop["Name"]: prop for prop in entity.get("Properties", [])}
+                for entity in schema.get("Entities", [])}
+
+    def _load_real(self, json_filename: str) -> Optional[List[Dict[str, Any]]]:
+        path = self.data_dir / json_filename
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, list) and data else None
+
+    def _entity(self, name: str) -> Dict[str, Dict[str, Any]]:
+        for candidate in singular_names(name.split(".")[-1]):
+            properties = self.entities.get(entity_key(candidate))
+            if properties is not None:
+                return properties
+        return {}
+
+    def _value(self, field: str, prop: Optional[Dict[str, Any]], index: int) -> Any:
+        """Synthesize a value of the declared type, None now and then for nullable properties."""
+        if field == "ModuleId":
+            return self.module_ids[index % len(self.module_ids)]
+        if prop is None:
+            return f"{field} {index}"
+        if prop.get("IsNullable") and self.random.random() < 0.1:
+            return None
+
+        value_type = prop.get("Type", "System.String")
+        if value_type in ("System.Int32", "System.Int64", "System.Int16"):
+            return index if field == "Id" else self.random.randrange(1, 10 ** 6)
+        if value_type in ("System.Double", "System.Decimal", "System.Single"):
+            return round(self.random.random() * 1000, 3)
+        if value_type == "System.Boolean":
+            return self.random.random() < 0.5
+        if value_type == "System.Guid":
+            return str(uuid.UUID(int=self.random.getrandbits(128)))
+        if value_type == "System.DateTime":
+            return f"2024-01-{index % 28 + 1:02d}T00:00:00"
+        return f"{field} {index}"
+
+    def _record(self, name: str, fields: List[str], index: int, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Synthesize a record with every entity property and configured field."""
+        properties = self._entity(name)
+        record = {field: self._value(field, prop, index) for field, prop in properties.items()
+                  if not prop.get("IsCollection")}
+        for field in fields:
+            if field not in record:
+                record[field] = self._value(field, None, index)
+        for field, expected in filters.items():
+            record[field] = expected[index % len(expected)] if isinstance(expected, list) else expected
+        return record
+
+    def _add_children(self, record: Dict[str, Any], children: Dict[str, Any], index: int):
+        """Add configured children missing from a record, nested lists get fanout items."""
+        for child_key, child_config in children.items():
+            *parents, leaf = child_key.split(".")
+            parent = record
+            for key in parents:
+                if not isinstance(parent.get(key), dict):
+                    parent[key] = {}
+                parent = parent[key]
+            if leaf in parent:
+                continue
+
+            items = []
+            for position in range(self.fanout):
+                child_index = index * self.fanout + position
+                item = self._record(leaf, child_config.get("fields", []), child_index,
+                                    child_config.get("filters", {}))
+                self._add_children(item, child_config.get("children", {}), child_index)
+                items.append(item)
+            parent[leaf] = items
+
+    def _add_nesting(self, record: Dict[str, Any]):
+        """Deepen ConfigJson with unconfigured levels the parser still has to walk."""
+        config_json = record.get("ConfigJson")
+        if not self.nesting or not isinstance(config_json, dict):
+            return
+        layout = {"Level": self.nesting, "Text": "x" * 32}
+        for level in range(self.nesting - 1, 0, -1):
+            layout = {"Level": level, "Items": [layout, {"Level": level, "Text": "x" * 32}]}
+        config_json["Layout"] = layout
+
+    def _file_configs(self, json_filename: str) -> List[Dict[str, Any]]:
+        config = self.config_manager.get_config(json_filename)
+        return config if isinstance(config, list) else [config]
+
+    def iter_records(self, json_filename: str) -> Iterator[Dict[str, Any]]:
+        """Yield the records of a file, copies of the real records when there are any."""
+        configs = self._file_configs(json_filename)
+        real_records = self._load_real(json_filename)
+        base_count = len(real_records) if real_records else DEFAULT_RECORDS
+        # The lookup file keeps its real size, scaling it would only duplicate ModuleIds
+        count = base_count if json_filename == MODULES_FILE else max(1, int(base_count * self.scale))
+
+        fields = list(dict.fromkeys(field for config in configs for field in config.get("fields", [])))
+        # Cycle through the values schemas filter on, so every schema gets records
+        filters = {}
+        for config in configs:
+            for field, expected in config.get("filters", {}).items():
+                values = filters.setdefault(field, [])
+                values.extend(expected if isinstance(expected, list) else [expected])
+
+        name = json_filename[:-len(".json")]
+        for index in range(count):
+            if real_records:
+                record = json.loads(json.dumps(real_records[index % base_count]))
+                copy = index // base_count
+                for field, value in record.items():
+                    if copy and field.endswith("Id") and isinstance(value, int) and not isinstance(value, bool):
+                        record[field] = value + copy * ID_STRIDE
+            else:
+                record = self._record(name, fields, index + 1, filters)
+            for config in configs:
+                self._add_children(record, config.get("children", {}), index)
+            self._add_nesting(record)
+            yield record
+
+    def write_zip(self, zip_path: Path) -> Dict[str, int]:
+        """Write every configured file into a ZIP, returns the record count per file."""
+        counts = {}
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for json_filename in self.config_manager.get_supported_files():
+                counts[json_filename] = 0
+                with archive.open(json_filename, 'w') as f:
+                    f.write(b"[")
+                    for record in self.iter_records(json_filename):
+                        if counts[json_filename]:
+                            f.write(b",\n")
+                        f.write(json.dumps(record).encode("utf-8"))
+                        counts[json_filename] += 1
+                    f.write(b"]")
+            # Shipped with every export, the importer derives column types from it
+            schema_path = self.data_dir / SCHEMA_FILE
+            if schema_path.exists():
+                archive.write(schema_path, SCHEMA_FILE)
+        return counts
+
+
+def run_mode(zip_path: Path, db_path: Path, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Import a tenant with the given import_tenant options, returns wall time, GC time and stats per stage."""
+    # Imported here so generating a tenant does not load the import pipeline
+    from main import import_tenant
+
+    # Collections of the garbage collector in this process, parser processes are not included
+    gc_timing = {"seconds": 0.0, "collections": 0, "started": 0.0}
+
+    def on_gc(phase: str, info: Dict[str, Any]):
+        if phase == "start":
+            gc_timing["started"] = time.perf_counter()
+        else:
+            gc_timing["seconds"] += time.perf_counter() - gc_timing["started"]
+            gc_timing["collections"] += 1
+
+    stats_path = db_path.with_suffix(".stats.json")
+    gc.callbacks.append(on_gc)
+    start = time.perf_counter()
+    try:
+        import_tenant(zip_path, db_path, ConfigManager(), quiet=True, stats_path=stats_path, **options)
+    finally:
+        wall_seconds = time.perf_counter() - start
+        gc.callbacks.remove(on_gc)
+
+    with open(stats_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)["stages"]
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        stage = stages.setdefault(record["stage"], {"seconds": 0.0, "count": 0, "peak_memory_mb": None})
+        stage["seconds"] += record["seconds"]
+        stage["count"] += record["count"]
+        if record["peak_memory_mb"] is not None:
+            stage["peak_memory_mb"] = max(stage["peak_memory_mb"] or 0.0, record["peak_memory_mb"])
+    for stage in stages.values():
+        stage["per_second"] = stage["count"] / stage["seconds"] if stage["seconds"] and stage["count"] else None
+
+    rows = stages.get("insert", {}).get("count", 0)
+    return {
+        "wall_seconds": wall_seconds,
+        "rows": rows,
+        "rows_per_second": rows / wall_seconds if wall_seconds else None,
+        "peak_memory_mb": stages.get("total", {}).get("peak_memory_mb"),
+        "gc_seconds": gc_timing["seconds"],
+        "gc_collections": gc_timing["collections"],
+        "stages": stages,
+    }
+
+
+def median_result(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine repeated runs of a mode into the median of every timing, peak RSS and count."""
+    if len(runs) == 1:
+        return runs[0]
+    result = {key: statistics.median(run[key] for run in runs)
+              for key in ("wall_seconds", "rows", "gc_seconds", "gc_collections")}
+    result["rows_per_second"] = result["rows"] / result["wall_seconds"] if result["wall_seconds"] else None
+    peaks = [run["peak_memory_mb"] for run in runs if run["peak_memory_mb"] is not None]
+    result["peak_memory_mb"] = statistics.median(peaks) if peaks else None
+    result["stages"] = {}
+    for stage in runs[0]["stages"]:
+        values = [run["stages"][stage] for run in runs if stage in run["stages"]]
+        seconds = statistics.median(value["seconds"] for value in values)
+        count = values[0]["count"]
+        stage_peaks = [value["peak_memory_mb"] for value in values if value["peak_memory_mb"] is not None]
+        result["stages"][stage] = {"seconds": seconds, "count": count,
+                                   "per_second": count / seconds if seconds and count else None,
+                                   "peak_memory_mb": statistics.median(stage_peaks) if stage_peaks else None}
+    result["runs"] = len(runs)
+    return result
+
+
+def print_result(mode: str, result: Dict[str, Any]):
+    peak = result["peak_memory_mb"]
+    print(f"==== {mode}: {result['wall_seconds']:.2f}s wall, {result['rows']} rows, "
+          f"{result['rows_per_second']:.0f} rows/s, peak RSS {peak:.0f} MB" if peak is not None else
+          f"==== {mode}: {result['wall_seconds']:.2f}s wall, {result['rows']} rows, "
+          f"{result['rows_per_second']:.0f} rows/s")
+    print(f"  garbage collection: {result['gc_seconds']:.3f}s in {result['gc_collections']} collections")
+    if result.get("runs"):
+        print(f"  median of {result['runs']} runs")
+    # Peak RSS is the process peak reached by the end of a stage, not the memory of the stage alone
+    print(f"  {'stage':<20} {'seconds':>9} {'count':>11} {'per second':>12} {'max RSS':>8}")
+    for stage, values in result["stages"].items():
+        per_second = f"{values['per_second']:.0f}" if values["per_second"] else "-"
+        peak_mb = f"{values['peak_memory_mb']:.0f}" if values["peak_memory_mb"] is not None else "-"
+        print(f"  {stage:<20} {values['seconds']:>9.3f} {values['count']:>11} {per_second:>12} {peak_mb:>8}")
+
+
+def _import_seconds(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter, from python -X importtime."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise Exception(f"No import time reported for {module}")
+
+
+def measure_startup(executable: Optional[Path], runs: int) -> Dict[str, Any]:
+    """Best-of-runs import time of main, config load, and cold start of the CLI."""
+    command = [str(executable), "--help"] if executable else [sys.executable, str(Path(__file__).parent / "main.py"),
+                                                                 "--help"]
+    timings: Dict[str, List[float]] = {"import_main": [], "config_load": [], "cold_start": []}
+    for _ in range(runs):
+        timings["import_main"].append(_import_seconds("main"))
+        start = time.perf_counter()
+        ConfigManager()
+        timings["config_load"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        timings["cold_start"].append(time.perf_counter() - start)
+    return {"command": command, "runs": runs,
+            "seconds": {stage: min(values) for stage, values in timings.items()}}
+
+
+def print_startup(result: Dict[str, Any]):
+    print(f"==== Startup, best of {result['runs']} runs ({' '.join(result['command'])}):")
+    for stage, seconds in result["seconds"].items():
+        print(f"  {stage:<20} {seconds * 1000:>9.1f} ms")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the import pipeline on a synthetic tenant.")
+    parser.add_argument("--scale", type=float, default=1, help="records per file relative to the real export")
+    parser.add_argument("--fanout", type=int, default=DEFAULT_FANOUT, help="items per generated nested list")
+    parser.add_argument("--nesting", type=int, default=0, help="extra unconfigured ConfigJson levels")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, the same seed gives the same tenant")
+    parser.add_argument("--zip", type=Path, help="benchmark an existing tenant ZIP instead of generating one")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=["sequential"],
+                        help="ingestion modes to compare")
+    parser.add_argument("--work-dir", type=Path, help="keep the generated ZIP and databases in this directory")
+    parser.add_argument("--json", type=Path, help="write the results as JSON")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="imports per mode, each in a fresh process, the median of every timing is reported")
+    parser.add_argument("--startup", action="store_true",
+                        help="measure import time and cold start instead of an import")
+    parser.add_argument("--executable", type=Path, help="packaged binary whose cold start --startup measures")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions of the --startup measurements")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        result = measure_startup(args.executable, args.runs)
+        print_startup(result)
+        if args.json is not None:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({"startup": result}, f, indent=2)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.work_dir or Path(temp_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        zip_path = args.zip
+        if zip_path is None:
+            zip_path = work_dir / f"tenant_x{args.scale:g}.zip"
+            start = time.perf_counter()
+            generator = TenantGenerator(ConfigManager(), args.scale, args.fanout, args.nesting, args.seed)
+            counts = generator.write_zip(zip_path)
+            print(f"Generated {zip_path} with {sum(counts.values())} records in "
+                  f"{time.perf_counter() - start:.1f}s ({zip_path.stat().st_size >> 20} MB)")
+
+        results = {}
+        for mode in args.modes:
+            runs = []
+            for _ in range(max(1, args.repeat)):
+                # A freshly spawned process per import, a forked one would start with the generator's memory
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    db_path = work_dir / f"{zip_path.stem}_{mode}.db"
+                    runs.append(executor.submit(run_mode, zip_path, db_path, MODES[mode]).result())
+            results[mode] = median_result(runs)
+            print_result(mode, results[mode])
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"scale": args.scale, "fanout": args.fanout, "nesting": args.nesting, "seed": args.seed,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import json
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from extraction_plan import NestedPlan, SchemaPlan
+
+# SQLite column affinity per .NET property type, every other type is stored as TEXT
+TYPE_AFFINITIES = {
+    "System.Int16": "INTEGER",
+    "System.Int32": "INTEGER",
+    "System.Int64": "INTEGER",
+    "Int64": "INTEGER",
+    "System.Boolean": "INTEGER",
+    "System.Double": "REAL",
+    "System.Single": "REAL",
+    "System.Decimal": "REAL",
+}
+
+
+class ColumnType(NamedTuple):
+    """SQLite column type derived from an entity property."""
+    affinity: str
+    # Whether a missing ("") value is stored as NULL, only for nullable non-string properties
+    empty_is_null: bool
+
+
+class EntityProperty(NamedTuple):
+    type: str
+    nullable: bool
+    collection: bool
+
+
+# Entity name -> property name -> property
+Entities = Dict[str, Dict[str, EntityProperty]]
+
+
+def entity_key(name: str) -> str:
+    """Normalised entity name, e.g. Rule_Group and rulegroup match."""
+    return name.replace("_", "").lower()
+
+
+def singular_names(name: str) -> List[str]:
+    """Candidate entity names for a plural file, table or child key, e.g. rule_group_measure_usages."""
+    candidates = [name]
+    if name.endswith("ies"):
+        candidates.append(name[:-3] + "y")
+    if name.endswith("es"):
+        candidates.append(name[:-2])
+    if name.endswith("s"):
+        candidates.append(name[:-1])
+    return candidates
+
+
+def load_entities(stream: BinaryIO) -> Entities:
+    """Read the entity definitions of a _schema.json stream, keyed by normalised entity name."""
+    schema = json.load(stream)
+    entities = {}
+    for entity in schema.get("Entities", []):
+        entities[entity_key(entity["Name"])] = {
+            prop["Name"]: EntityProperty(prop.get("Type", ""), bool(prop.get("IsNullable")),
+                                         bool(prop.get("IsCollection")))
+            for prop in entity.get("Properties", [])
+        }
+    return entities
+
+
+def _find_entity(entities: Entities, name: str) -> Optional[Dict[str, EntityProperty]]:
+    """Find the entity of a plural file or table name, e.g. modules -> RpcModule."""
+    candidates = singular_names(name)
+    for candidate in map(entity_key, candidates):
+        if candidate in entities:
+            return entities[candidate]
+    # Prefixed entity names, only when the match is unambiguous
+    for candidate in map(entity_key, candidates):
+        matches = [key for key in entities if key.endswith(candidate)]
+        if len(matches) == 1:
+            return entities[matches[0]]
+    return None
+
+
+def _child_entity(entities: Entities, entity: Optional[Dict[str, EntityProperty]],
+                  key_path: Tuple[str, ...]) -> Optional[Dict[str, EntityProperty]]:
+    """Follow a child key path through entity properties, None once it leaves the declared entities."""
+    for key in key_path:
+        prop = entity.get(key) if entity is not None else None
+        if prop is None:
+            return None
+        entity = entities.get(entity_key(prop.type.rstrip("[]")))
+    return entity
+
+
+def _column_type(prop: Optional[EntityProperty]) -> Optional[ColumnType]:
+    if prop is None or prop.collection:
+        return None
+    affinity = TYPE_AFFINITIES.get(prop.type, "TEXT")
+    return ColumnType(affinity, prop.nullable and prop.type != "System.String")
+
+
+class _TypeCollector:
+    """Collects column types per table, columns declared with different types fall back to TEXT."""
+
+    def __init__(self, entities: Entities):
+        self.entities = entities
+        self.types: Dict[str, Dict[str, ColumnType]] = {}
+        self.conflicts: Dict[str, Set[str]] = {}
+
+    def add(self, table_name: str, columns: Tuple[str, ...], fields: Tuple[str, ...],
+            entity: Optional[Dict[str, EntityProperty]]):
+        if entity is None:
+            return
+        table_types = self.types.setdefault(table_name, {})
+        conflicts = self.conflicts.setdefault(table_name, set())
+        for column, field in zip(columns, fields):
+            column_type = _column_type(entity.get(field))
+            if column_type is None or column in conflicts:
+                continue
+            existing = table_types.setdefault(column, column_type)
+            if existing.affinity != column_type.affinity:
+                del table_types[column]
+                conflicts.add(column)
+            elif existing != column_type:
+                table_types[column] = ColumnType(existing.affinity, False)
+
+    def add_schema(self, plan: SchemaPlan, entity: Optional[Dict[str, EntityProperty]]):
+        self.add(plan.table, plan.columns, plan.columns, entity)
+
+        for child in plan.children:
+            child_entity = _child_entity(self.entities, entity, child.key_path)
+            if child.schema is not None:
+                # Children without a declared property are matched by their table name
+                if child_entity is None:
+                    child_entity = _find_entity(self.entities, child.schema.table)
+                self.add_schema(child.schema, child_entity)
+            else:
+                flatten = child.flatten
+                self.add(flatten.table, plan.fields, plan.fields, entity)
+                self.add(flatten.table, flatten.columns, flatten.fields, child_entity)
+                self._add_nested(flatten.table, flatten.nested, child_entity)
+
+    def _add_nested(self, table_name: str, nested_plans: Tuple[NestedPlan, ...],
+                    entity: Optional[Dict[str, EntityProperty]]):
+        for nested in nested_plans:
+            nested_entity = _child_entity(self.entities, entity, nested.key_path)
+            self.add(table_name, nested.columns, nested.fields, nested_entity)
+            self._add_nested(table_name, nested.children, nested_entity)
+
+
+def plan_column_types(plans: Dict[str, Tuple[SchemaPlan, ...]], entities: Entities
+                      ) -> Dict[str, Dict[str, ColumnType]]:
+    """Map the columns of every configured table to a SQLite type, columns not found stay TEXT."""
+    collector = _TypeCollector(entities)
+    for json_filename, file_plans in plans.items():
+        entity = _find_entity(entities, json_filename.rsplit(".", 1)[0])
+        for plan in file_plans:
+            collector.add_schema(plan, entity)
+    return {table_name: types for table_name, types in collector.types.items() if types}
+
+
+def column_definition(column: str, column_type: Optional[ColumnType]) -> str:
+    return f"{column} {column_type.affinity if column_type is not None else 'TEXT'}"
+
+
+def empty_null_indexes(columns: Tuple[str, ...], types: Dict[str, ColumnType]) -> List[int]:
+    """Positions of the columns whose "" values are stored as NULL."""
+    return [index for index, column in enumerate(columns)
+            if column in types and types[column].empty_is_null]
+
+
+def coerce_rows(rows: List[List[Any]], indexes: List[int]):
+    """Replace "" defaults with NULL at the given positions, in place."""
+    for row in rows:
+        for index in indexes:
+            if row[index] == "":
+                row[index] = None
@@ -0,0 +1,272 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from column_types import ColumnType
+from json_processor import DEFAULT_BATCH_SIZE, TableSink
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+try:
+    import pyarrow.parquet
+    parquet = pyarrow.parquet
+except ImportError:
+    parquet = None
+
+# Output formats of the columnar export, Arrow IPC needs no Parquet support in the pyarrow build
+OUTPUT_FORMATS = ("parquet", "arrow")
+
+# File extension per output format
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Oldest pyarrow release supported by the export
+PYARROW_MIN_VERSION = 14
+
+# Compression codec of the written files
+COMPRESSION = "zstd"
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """Convert a JSON value the way SQLite stores it in a TEXT column."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _to_integer(value: Any) -> Optional[int]:
+    """Convert a value for an INTEGER column, raises ValueError or TypeError for other values."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"not an integer: {value!r}")
+    return int(value)
+
+
+def _to_real(value: Any) -> Optional[float]:
+    """Convert a value for a REAL column, raises ValueError or TypeError for other values."""
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+# Value converter and Arrow type per SQLite affinity
+_CONVERTERS: Dict[str, Tuple[Callable[[Any], Any], Callable[[], Any]]] = {
+    "TEXT": (_to_text, lambda: pyarrow.string()),
+    "INTEGER": (_to_integer, lambda: pyarrow.int64()),
+    "REAL": (_to_real, lambda: pyarrow.float64()),
+}
+
+
+class ColumnarSink(TableSink):
+    """Sink writing every table as a Parquet or Arrow IPC file instead of into SQLite.
+
+    Each table's file is opened with its first batch and every batch is written as it arrives.
+    A file is rewritten batch by batch when its columns change after it was opened, and by
+    finish when ModuleId has to be replaced by ModuleName the way the SQLite output does.
+    """
+
+    def __init__(self, output_dir: Path, output_format: str = "parquet", batch_size: int = DEFAULT_BATCH_SIZE,
+                 verbose: bool = True):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if pyarrow is None:
+            raise Exception(f"The columnar export requires pyarrow: pip install 'pyarrow>={PYARROW_MIN_VERSION}'")
+        if int(pyarrow.__version__.split(".")[0]) < PYARROW_MIN_VERSION:
+            raise Exception(f"The columnar export requires pyarrow {PYARROW_MIN_VERSION} or later, "
+                            f"found {pyarrow.__version__}: pip install -U pyarrow")
+        if output_format == "parquet" and parquet is None:
+            print("Parquet is not supported by this pyarrow build, writing Arrow IPC files instead")
+            output_format = "arrow"
+
+        self.output_dir = output_dir
+        self.output_format = output_format
+        # Rows per batch read back when a file is rewritten
+        self.batch_size = batch_size
+        self.verbose = verbose
+        # Columns per table in order of appearance
+        self._column_order: Dict[str, Dict[str, None]] = {}
+        # Declared column types per table, other columns are text
+        self._column_types: Dict[str, Dict[str, ColumnType]] = {}
+        # Open file writer and its schema, per table
+        self._writers: Dict[str, Tuple[Any, Any]] = {}
+        # Rows written, per table
+        self._row_counts: Dict[str, int] = {}
+        # Typed columns that received a non-numeric value and are written as text, per table
+        self._text_columns: Dict[str, Set[str]] = {}
+        # (ModuleId, ModuleName) rows of the modules table, for the ModuleName lookup
+        self._module_rows: List[Tuple[Any, Any]] = []
+        # Tables whose ModuleId is replaced by ModuleName when written, set by replace_module_id
+        self._transform_tables: Set[str] = set()
+
+    def table_names(self) -> List[str]:
+        return list(self._column_order)
+
+    def columns(self, table_name: str) -> List[str]:
+        return list(self._column_order.get(table_name, {}))
+
+    def create_table(self, table_name: str, columns: List[str], types: Dict[str, ColumnType]):
+        self._column_order[table_name] = dict.fromkeys(columns)
+        self._column_types[table_name] = dict(types)
+
+    def add_column(self, table_name: str, column: str, column_type: Optional[ColumnType]):
+        self._column_order.setdefault(table_name, {})[column] = None
+        if column_type is not None:
+            self._column_types.setdefault(table_name, {})[column] = column_type
+
+    def _arrow_type(self, table_name: str, column: str) -> Tuple[Callable[[Any], Any], Any]:
+        column_type = self._column_types.get(table_name, {}).get(column)
+        if column_type is None or column in self._text_columns.get(table_name, ()):
+            converter, arrow_type = _CONVERTERS["TEXT"]
+        else:
+            converter, arrow_type = _CONVERTERS[column_type.affinity]
+        return converter, arrow_type()
+
+    def _convert(self, table_name: str, column: str, values: List[Any]) -> Any:
+        """Convert the values of a column to an Arrow array.
+
+        A typed column receiving a value that is not a number is written as text from then on,
+        like SQLite keeps such values as text in a column with numeric affinity.
+        """
+        converter, arrow_type = self._arrow_type(table_name, column)
+        try:
+            return pyarrow.array([converter(value) for value in values], type=arrow_type)
+        except (TypeError, ValueError) as e:
+            self._text_columns.setdefault(table_name, set()).add(column)
+            print(f"  == Column {column} of table {table_name} has a non-numeric value ({e}), written as text")
+            return pyarrow.array([_to_text(value) for value in values], type=pyarrow.string())
+
+    def _schema(self, table_name: str) -> Any:
+        """Arrow schema of a table's file."""
+        columns = list(self._column_order.get(table_name, {}))
+        return pyarrow.schema([(column, self._arrow_type(table_name, column)[1]) for column in columns])
+
+    def _path(self, table_name: str) -> Path:
+        return self.output_dir / f"{table_name}{FORMAT_EXTENSIONS[self.output_format]}"
+
+    def _open_writer(self, table_name: str, schema: Any):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(table_name)
+        if self.output_format == "parquet":
+            writer = parquet.ParquetWriter(str(path), schema, compression=COMPRESSION)
+        else:
+            writer = pyarrow.ipc.new_file(str(path), schema,
+                                          options=pyarrow.ipc.IpcWriteOptions(compression=COMPRESSION))
+        self._writers[table_name] = (writer, schema)
+
+    def _conform(self, batch: Any, schema: Any, lookup: Optional[Dict[Any, Any]] = None) -> Any:
+        """Arrange a batch in the columns and types of a schema, missing columns are null.
+
+        With a lookup, ModuleName is filled from the batch's ModuleId.
+        """
+        arrays = []
+        for field in schema:
+            if field.name in batch.schema.names:
+                array = batch.column(field.name)
+                arrays.append(array if array.type == field.type else array.cast(field.type))
+            elif field.name == "ModuleName" and lookup is not None and "ModuleId" in batch.schema.names:
+                module_ids = batch.column("ModuleId").to_pylist()
+                arrays.append(pyarrow.array([lookup.get(_to_text(module_id)) for module_id in module_ids],
+                                            type=field.type))
+            else:
+                arrays.append(pyarrow.nulls(batch.num_rows, type=field.type))
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def _written_batches(self, path: Path) -> Iterator[Any]:
+        """Read back the batches of a written file one at a time."""
+        if self.output_format == "parquet":
+            yield from parquet.ParquetFile(path).iter_batches(batch_size=self.batch_size)
+        else:
+            with pyarrow.memory_map(str(path)) as source:
+                reader = pyarrow.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    yield reader.get_batch(index)
+
+    def _rewrite(self, table_name: str, schema: Any, lookup: Optional[Dict[Any, Any]] = None):
+        """Rewrite the written file of a table in a new schema, one batch at a time."""
+        writer, _ = self._writers.pop(table_name)
+        writer.close()
+        path = self._path(table_name)
+        old_path = path.with_name(f"{path.name}.old")
+        os.replace(path, old_path)
+        try:
+            self._open_writer(table_name, schema)
+            writer, _ = self._writers[table_name]
+            for batch in self._written_batches(old_path):
+                writer.write_batch(self._conform(batch, schema, lookup))
+        finally:
+            old_path.unlink()
+
+    def _write_batch(self, table_name: str, batch: Any):
+        """Write a batch to the table's file, opening it or widening its schema first."""
+        schema = self._schema(table_name)
+        if table_name not in self._writers:
+            self._open_writer(table_name, schema)
+        elif not self._writers[table_name][1].equals(schema):
+            # A column was added or demoted to text after the file was opened
+            self._rewrite(table_name, schema)
+        writer, _ = self._writers[table_name]
+        writer.write_batch(self._conform(batch, schema))
+        self._row_counts[table_name] = self._row_counts.get(table_name, 0) + batch.num_rows
+
+    def insert_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[List[Any]]):
+        """Convert a batch of rows to an Arrow record batch and write it to the table's file."""
+        start = time.perf_counter()
+        if table_name == "modules" and "ModuleId" in columns and "ModuleName" in columns:
+            id_index, name_index = columns.index("ModuleId"), columns.index("ModuleName")
+            self._module_rows.extend((_to_text(row[id_index]), row[name_index]) for row in rows)
+
+        arrays = [self._convert(table_name, column, [row[index] for row in rows])
+                  for index, column in enumerate(columns)]
+        self._write_batch(table_name, pyarrow.RecordBatch.from_arrays(arrays, names=list(columns)))
+        if self.stats is not None:
+            self.stats.add("insert", time.perf_counter() - start, len(rows), table_name)
+
+    def module_rows(self) -> List[Tuple[Any, Any]]:
+        return self._module_rows
+
+    def replace_module_id(self, table_names: List[str]):
+        """Mark tables loaded before modules, their ModuleId is replaced by ModuleName when finish rewrites them."""
+        for table_name in table_names:
+            self._column_order[table_name] = dict.fromkeys(
+                ["ModuleName"] + [column for column in self._column_order[table_name] if column != "ModuleId"])
+        self._transform_tables.update(table_names)
+
+    def finish(self):
+        """Complete every table's file <output_dir>/<table><extension> and close it."""
+        # First name wins for duplicate ids, SQLite would duplicate the rows instead
+        lookup = {}
+        for module_id, module_name in self._module_rows:
+            lookup.setdefault(module_id, module_name)
+
+        for table_name in self._column_order:
+            start = time.perf_counter()
+            transform = table_name in self._transform_tables
+            schema = self._schema(table_name)
+            if table_name not in self._writers:
+                # Tables without rows are written empty
+                self._open_writer(table_name, schema)
+            elif transform or not self._writers[table_name][1].equals(schema):
+                self._rewrite(table_name, schema, lookup if transform else None)
+            writer, _ = self._writers.pop(table_name)
+            writer.close()
+            rows = self._row_counts.get(table_name, 0)
+            if self.stats is not None:
+                self.stats.add("write", time.perf_counter() - start, rows, table_name)
+            if self.verbose:
+                print(f"  == Wrote {rows} rows to {self._path(table_name)}")
+
+    def close(self):
+        """Close the files still open after a failed export."""
+        for writer, _ in self._writers.values():
+            writer.close()
+        self._writers.clear()
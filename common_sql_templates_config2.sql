@@ -34,6 +34,43 @@ JOIN rule_groups_labels rgl
 	ON proc.RuleGroupLabelId = rgl.Id
 WHERE proc.RuleGroupContent_RuleGroupText LIKE '%Activity Lead Time%';
 
+-- Search Measure Usage in ActiveRule (full-text index)
+SELECT
+	ar.ModuleName,
+	rgl.LabelName AS FolderName,
+	rgl.LabelType AS FolderType,
+	ar.RuleGroupContent_RuleGroupText AS ActiveRule
+FROM active_rules ar
+JOIN rule_groups_labels rgl
+	ON ar.RuleGroupLabelId = rgl.Id
+WHERE ar.rowid IN (
+	SELECT rowid FROM active_rules_fts
+	WHERE RuleGroupContent_RuleGroupText LIKE '%Activity Lead Time%');
+
+-- Search Measure Usage in Procedure (full-text index)
+SELECT
+	proc.ModuleName,
+	proc.RuleGroupName AS ProcedureName,
+	rgl.LabelName AS ProcedureFolder,
+	rgl.LabelType AS FolderType,
+	proc.RuleGroupContent_RuleGroupText AS Proc_Codes
+FROM procedures proc
+JOIN rule_groups_labels rgl
+	ON proc.RuleGroupLabelId = rgl.Id
+WHERE proc.rowid IN (
+	SELECT rowid FROM procedures_fts
+	WHERE RuleGroupContent_RuleGroupText LIKE '%Activity Lead Time%');
+
+-- Search Measure Usage in Python Plugin (full-text index)
+SELECT
+	pps.InstanceName,
+	pps.Description,
+	pps.ConfigJson_ScriptCode AS ScriptCode
+FROM python_plugin_script pps
+WHERE pps.rowid IN (
+	SELECT rowid FROM python_plugin_script_fts
+	WHERE ConfigJson_ScriptCode LIKE '%Activity Lead Time%');
+
 -- Search Measure Usage in ActionButton
 SELECT
 	abmu.ModuleName,
@@ -1,6 +1,8 @@
 import json
+import hashlib
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from extraction_plan import SchemaPlan, compile_config, plan_tables
 
 class ConfigManager:
     """Simple configuration manager using JSON format."""
@@ -8,6 +10,7 @@ class ConfigManager:
     def __init__(self):
         self.config_file = Path(__file__).parent / "tables_config.json"
         self.config = self._load_config()
+        self.plans = self._compile_plans()
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
@@ -39,6 +42,11 @@ class ConfigManager:
             print(f"Error loading config: {e}")
             return {"json_files": {}}
 
+    def _compile_plans(self) -> Dict[str, Tuple[SchemaPlan, ...]]:
+        """Compile every configured schema once into an extraction plan."""
+        return {json_filename: compile_config(config)
+                for json_filename, config in self.config.get("json_files", {}).items()}
+
     def get_config(self, json_filename: str) -> Optional[Dict[str, Any]]:
         """Get configuration for a JSON file."""
         return self.config.get("json_files", {}).get(json_filename)
@@ -46,3 +54,19 @@ class ConfigManager:
     def get_supported_files(self) -> List[str]:
         """Get list of supported JSON files."""
         return list(self.config.get("json_files", {}).keys())
+
+    def get_plans(self, json_filename: str) -> Optional[Tuple[SchemaPlan, ...]]:
+        """Get compiled extraction plans for a JSON file."""
+        return self.plans.get(json_filename)
+
+    def get_tables(self, json_filename: str) -> List[str]:
+        """Get names of all tables produced from a JSON file."""
+        tables = []
+        for plan in self.plans.get(json_filename, ()):
+            tables.extend(plan_tables(plan))
+        return list(dict.fromkeys(tables))
+
+    def get_schema_hash(self, json_filename: str) -> str:
+        """Get a hash of the configuration of a JSON file, to detect schema changes."""
+        config = json.dumps(self.get_config(json_filename), sort_keys=True)
+        return hashlib.sha1(config.encode("utf-8")).hexdigest()
@@ -0,0 +1,45 @@
+import json
+import zipfile
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from config_manager import ConfigManager
+
+# modules.json of the test tenants, every workspace belongs to its only module
+MODULES = [{"ModuleId": "m1", "ModuleName": "Planning"}]
+
+
+@pytest.fixture
+def make_zip(tmp_path: Path):
+    """Write a tenant ZIP with the given {file name: JSON data} members under a config.json/ folder."""
+    def make(files: Dict[str, Any], name: str = "tenant.zip") -> Path:
+        zip_path = tmp_path / name
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for file_name, data in files.items():
+                zip_file.writestr(f"config.json/{file_name}", data if isinstance(data, str) else json.dumps(data))
+        return zip_path
+    return make
+
+
+@pytest.fixture(scope="session")
+def config_manager() -> ConfigManager:
+    """Configuration of tables_config.json, shared since tests only read it."""
+    return ConfigManager()
+
+
+@pytest.fixture
+def tenant_zip(make_zip):
+    """Write a tenant ZIP with MODULES and the given number of workspaces."""
+    def make(count: int = 3, name: str = "tenant.zip") -> Path:
+        return make_zip({"modules.json": MODULES, "workspaces.json": workspace_records(count)}, name)
+    return make
+
+
+def workspace_records(count: int, module_id: str = "m1"):
+    """Workspaces of workspaces.json with one page group each."""
+    return [{"ModuleId": module_id, "Id": f"w{index}", "Title": f"Workspace {index}", "Name": f"ws{index}",
+             "PageGroups": [{"ModuleId": module_id, "Id": f"g{index}", "Title": "Group", "Name": f"pg{index}",
+                             "WorkspaceId": f"w{index}"}]}
+            for index in range(count)]
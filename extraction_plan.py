@@ -0,0 +1,249 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+# How nested lists of a flattened child become rows: the first item only, one row per item
+# of each nested list, or one row per combination of items across nested lists
+EXPLODE_MODES = ("first", "items", "cartesian")
+
+# Maximum rows produced from one flattened child item unless explode_limit is configured
+DEFAULT_EXPLODE_LIMIT = 1000
+
+
+class FilterPlan(NamedTuple):
+    """Compiled filter on a single field, list filters are turned into frozensets."""
+    field: str
+    expected: Any
+    is_set: bool
+
+
+class NestedPlan(NamedTuple):
+    """Nested child flattened into the same row as its parent item."""
+    key_path: Tuple[str, ...]
+    fields: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    children: Tuple["NestedPlan", ...]
+    # Positions of the columns in FlattenPlan.exploded_columns
+    slots: Tuple[int, ...]
+
+
+class FlattenPlan(NamedTuple):
+    """Child without parent_id, flattened together with the parent fields into its own table."""
+    table: str
+    fields: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    nested: Tuple[NestedPlan, ...]
+    # Parent fields followed by the child's own columns, the start of every row
+    base_columns: Tuple[str, ...]
+    # Columns of all nested children, the column set of every exploded row
+    nested_columns: Tuple[str, ...]
+    # Fixed layout of exploded rows, base_columns followed by nested_columns
+    exploded_columns: Tuple[str, ...]
+    # Whether flattened column names can collide and rows need de-duplicating
+    has_overlap: bool
+    # One of EXPLODE_MODES
+    explode: str
+    # Maximum rows per flattened child item when exploding nested lists
+    explode_limit: int
+
+
+class ChildPlan(NamedTuple):
+    """Child of a schema, either processed as its own schema (parent_id) or flattened."""
+    key_path: Tuple[str, ...]
+    schema: Optional["SchemaPlan"]
+    flatten: Optional[FlattenPlan]
+
+
+class SchemaPlan(NamedTuple):
+    """Precomputed extraction plan for one table definition in tables_config.json."""
+    table: str
+    fields: Tuple[str, ...]
+    parent_id: Optional[str]
+    columns: Tuple[str, ...]
+    filters: Tuple[FilterPlan, ...]
+    children: Tuple[ChildPlan, ...]
+    # Column tuples to index once the load is finished
+    indexes: Tuple[Tuple[str, ...], ...]
+    # Text columns searchable through an FTS5 trigram index
+    fulltext: Tuple[str, ...]
+
+
+class DispatchPlan(NamedTuple):
+    """Routes each record of a file with several schemas to the schemas whose filters can match it."""
+    schemas: Tuple[SchemaPlan, ...]
+    # Filter field whose value selects the candidate schemas, None when no schema filters
+    field: Optional[str]
+    # Field value -> indexes of the candidate schemas, in configuration order
+    routes: Dict[Any, Tuple[int, ...]]
+    # Candidates for values without a route, the schemas not filtering on the field
+    default: Tuple[int, ...]
+    # Filters left to check per schema once routed
+    filters: Tuple[Tuple[FilterPlan, ...], ...]
+
+
+def _sanitize_key(key: str) -> str:
+    """Make a child key usable as part of an SQL column name."""
+    return key.replace(".", "_").replace("-", "_").replace(" ", "_")
+
+
+def _compile_filters(filters: Dict[str, Any]) -> Tuple[FilterPlan, ...]:
+    compiled = []
+    for field, value in (filters or {}).items():
+        if isinstance(value, list):
+            compiled.append(FilterPlan(field, frozenset(value), True))
+        else:
+            compiled.append(FilterPlan(field, value, False))
+    return tuple(compiled)
+
+
+def _compile_indexes(config: Dict[str, Any], fields: Tuple[str, ...], parent_id: Optional[str]
+                     ) -> Tuple[Tuple[str, ...], ...]:
+    """Use declared indexes, or infer join keys from parent_id and *Id fields."""
+    if "indexes" in config:
+        declared = [(index,) if isinstance(index, str) else tuple(index) for index in config["indexes"]]
+        return tuple(dict.fromkeys(declared))
+
+    # ModuleId is replaced by ModuleName and never joined on
+    key_fields = [field for field in fields if field.endswith("Id") and field != "ModuleId"]
+    if parent_id:
+        key_fields.append(parent_id)
+    return tuple((field,) for field in dict.fromkeys(key_fields))
+
+
+def _compile_nested(nested_children: Dict[str, Any], parent_prefix: str) -> Tuple[NestedPlan, ...]:
+    plans = []
+    for nested_key, nested_config in nested_children.items():
+        prefix = f"{parent_prefix}_{_sanitize_key(nested_key)}"
+        fields = tuple(nested_config.get("fields", []))
+        plans.append(NestedPlan(
+            key_path=tuple(nested_key.split(".")),
+            fields=fields,
+            columns=tuple(f"{prefix}_{field}" for field in fields),
+            children=_compile_nested(nested_config.get("children", {}), prefix),
+            slots=(),
+        ))
+    return tuple(plans)
+
+
+def _assign_slots(nested: Tuple[NestedPlan, ...], slots: Dict[str, int]) -> Tuple[NestedPlan, ...]:
+    """Set the row positions of nested columns, a repeated column name shares one position."""
+    return tuple(plan._replace(slots=tuple(slots[column] for column in plan.columns),
+                               children=_assign_slots(plan.children, slots))
+                 for plan in nested)
+
+
+def _nested_columns(nested: Tuple[NestedPlan, ...]) -> List[str]:
+    columns = []
+    for plan in nested:
+        columns.extend(plan.columns)
+        columns.extend(_nested_columns(plan.children))
+    return columns
+
+
+def _compile_flatten(child_key: str, child_config: Dict[str, Any], parent_fields: Tuple[str, ...]) -> FlattenPlan:
+    prefix = _sanitize_key(child_key)
+    fields = tuple(child_config.get("fields", []))
+    columns = tuple(f"{prefix}_{field}" for field in fields)
+    nested = _compile_nested(child_config.get("children", {}), prefix)
+
+    explode = child_config.get("explode", "first")
+    if explode not in EXPLODE_MODES:
+        raise ValueError(f"Unknown explode mode for {child_config['table']}: {explode}")
+
+    all_columns = list(parent_fields) + list(columns) + _nested_columns(nested)
+    base_columns = parent_fields + columns
+    nested_columns = tuple(dict.fromkeys(_nested_columns(nested)))
+    slots = {column: len(base_columns) + index for index, column in enumerate(nested_columns)}
+    return FlattenPlan(
+        table=child_config["table"],
+        fields=fields,
+        columns=columns,
+        nested=_assign_slots(nested, slots),
+        base_columns=base_columns,
+        nested_columns=nested_columns,
+        exploded_columns=base_columns + nested_columns,
+        has_overlap=len(set(all_columns)) != len(all_columns),
+        explode=explode,
+        explode_limit=max(1, child_config.get("explode_limit", DEFAULT_EXPLODE_LIMIT)),
+    )
+
+
+def compile_schema(config: Dict[str, Any]) -> SchemaPlan:
+    """Compile a single table definition into an extraction plan."""
+    table_name = config["table"]
+    fields = tuple(config.get("fields", []))
+    parent_id = config.get("parent_id")
+
+    # Insert columns follow fields, duplicates keep their first position
+    columns = tuple(dict.fromkeys(fields + ((parent_id,) if parent_id else ())))
+
+    children = []
+    for child_key, child_config in config.get("children", {}).items():
+        key_path = tuple(child_key.split("."))
+        if child_config.get("parent_id"):
+            children.append(ChildPlan(key_path, compile_schema(child_config), None))
+        else:
+            children.append(ChildPlan(key_path, None, _compile_flatten(child_key, child_config, fields)))
+
+    return SchemaPlan(
+        table=table_name,
+        fields=fields,
+        parent_id=parent_id,
+        columns=columns,
+        filters=_compile_filters(config.get("filters", {})),
+        children=tuple(children),
+        indexes=_compile_indexes(config, fields, parent_id),
+        fulltext=tuple(config.get("fulltext", [])),
+    )
+
+
+def plan_tables(plan: SchemaPlan) -> List[str]:
+    """Names of all tables a schema writes to, including flattened and parent_id children."""
+    tables = [plan.table]
+    for child in plan.children:
+        if child.schema is not None:
+            tables.extend(plan_tables(child.schema))
+        else:
+            tables.append(child.flatten.table)
+    return list(dict.fromkeys(tables))
+
+
+def compile_config(config: Union[Dict[str, Any], List[Dict[str, Any]], SchemaPlan, Tuple[SchemaPlan, ...]]
+                   ) -> Tuple[SchemaPlan, ...]:
+    """Compile the schema(s) configured for a JSON file, already compiled plans are returned as they are."""
+    if isinstance(config, SchemaPlan):
+        return (config,)
+    if isinstance(config, tuple):
+        return config
+    if isinstance(config, list):
+        return tuple(compile_schema(schema_config) for schema_config in config)
+    return (compile_schema(config),)
+
+
+def compile_dispatch(plans: Tuple[SchemaPlan, ...]) -> DispatchPlan:
+    """Index schemas by the filter field most of them share, so a record is only checked against its candidates."""
+    field_counts: Dict[str, int] = {}
+    for plan in plans:
+        for filter_plan in plan.filters:
+            field_counts[filter_plan.field] = field_counts.get(filter_plan.field, 0) + 1
+    field = max(field_counts, key=field_counts.get) if field_counts else None
+
+    routes: Dict[Any, List[int]] = {}
+    default = []
+    filters = []
+    for index, plan in enumerate(plans):
+        field_filter = next((filter_plan for filter_plan in plan.filters if filter_plan.field == field), None)
+        filters.append(tuple(filter_plan for filter_plan in plan.filters if filter_plan is not field_filter))
+        if field_filter is None:
+            default.append(index)
+            continue
+        for value in (field_filter.expected if field_filter.is_set else (field_filter.expected,)):
+            routes.setdefault(value, [])
+            routes[value].append(index)
+
+    # Schemas without a filter on the field are candidates for every value
+    return DispatchPlan(
+        schemas=plans,
+        field=field,
+        routes={value: tuple(sorted(indexes + default)) for value, indexes in routes.items()},
+        default=tuple(default),
+        filters=tuple(filters),
+    )
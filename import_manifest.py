@@ -0,0 +1,74 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Table in the output database recording what the last import was built from
+MANIFEST_TABLE = "_import_manifest"
+
+# (content hash, size, schema hash) of a source file, the schema hash covers its config and _schema.json
+Signature = Tuple[str, int, str]
+
+
+def has_manifest(db_path: Path) -> bool:
+    """Whether an existing database was built by an import that recorded a manifest."""
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (MANIFEST_TABLE,))
+        return cursor.fetchone() is not None
+    except sqlite3.DatabaseError:
+        # Not a database at all, rebuilt like a database without manifest
+        return False
+    finally:
+        conn.close()
+
+
+class ImportManifest:
+    """Content hash, size and produced tables of every imported file, stored in the output database."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.signatures: Dict[str, Signature] = {}
+        self.tables: Dict[str, Set[str]] = {}
+
+    def load(self) -> bool:
+        """Read the manifest of the previous import, returns False when there is none."""
+        cursor = self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                   (MANIFEST_TABLE,))
+        if cursor.fetchone() is None:
+            return False
+
+        cursor = self.conn.execute(f"SELECT FileName, TableName, ContentHash, Size, SchemaHash FROM {MANIFEST_TABLE}")
+        for file_name, table_name, content_hash, size, schema_hash in cursor.fetchall():
+            self.signatures[file_name] = (content_hash, size, schema_hash)
+            self.tables.setdefault(file_name, set()).add(table_name)
+        return True
+
+    def changed_files(self, signatures: Dict[str, Signature]) -> Set[str]:
+        """Files that are new or whose content or schema differ from the previous import."""
+        return {file_name for file_name, signature in signatures.items()
+                if self.signatures.get(file_name) != signature}
+
+    def removed_files(self, file_names: Iterable[str]) -> Set[str]:
+        """Files of the previous import that are no longer part of the source."""
+        return set(self.signatures) - set(file_names)
+
+    def save(self, file_name: str, signature: Signature, tables: List[str]):
+        """Replace the manifest entry of a file."""
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+                FileName TEXT, TableName TEXT, ContentHash TEXT, Size INTEGER, SchemaHash TEXT, ImportedAt TEXT)
+        """)
+        self.remove(file_name)
+
+        imported_at = datetime.now().isoformat(timespec="seconds")
+        self.conn.executemany(f"INSERT INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+                              [(file_name, table_name, *signature, imported_at) for table_name in tables])
+        self.signatures[file_name] = signature
+        self.tables[file_name] = set(tables)
+
+    def remove(self, file_name: str):
+        """Forget a file, its tables are expected to be dropped by the caller."""
+        if self.signatures.pop(file_name, None) is not None:
+            self.conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE FileName = ?", (file_name,))
+        self.tables.pop(file_name, None)
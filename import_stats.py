@@ -0,0 +1,163 @@
+import json
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from extraction_plan import SchemaPlan, compile_config
+from json_stream import iter_json_items
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Table in the output database holding the stats of the last import
+STATS_TABLE = "_import_stats"
+
+# Stages that write to the database, excluded from the flatten time of a schema
+DB_STAGES = ("insert", "alter", "queue_wait")
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB, None when it cannot be determined."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Reported in bytes on macOS and in kilobytes elsewhere
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+class _TimedReader:
+    """Binary stream wrapper measuring the time spent reading (decompressing) the source."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.seconds = 0.0
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        start = time.perf_counter()
+        data = self.stream.read(size)
+        self.seconds += time.perf_counter() - start
+        self.size += len(data)
+        return data
+
+
+class ImportStats:
+    """Seconds, counts and peak memory per stage of an import, per file and table."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # File the following stages belong to, empty for stages of the whole import
+        self.current_file = ""
+        # (file, table, stage) -> [seconds, count, peak memory MB]
+        self.records: Dict[Tuple[str, str, str], List[Any]] = {}
+        # Running total of DB_STAGES seconds
+        self.db_seconds = 0.0
+
+    def add(self, stage: str, seconds: float, count: int = 0, table_name: str = "", peak_mb: Optional[float] = None):
+        """Add time and count to a stage of the current file."""
+        record = self.records.setdefault((self.current_file, table_name, stage), [0.0, 0, None])
+        record[0] += seconds
+        record[1] += count
+        if peak_mb is not None:
+            record[2] = peak_mb
+        if stage in DB_STAGES:
+            self.db_seconds += seconds
+
+    def merge(self, records: Dict[Tuple[str, str, str], List[Any]]):
+        """Add records collected in another process."""
+        for (file_name, table_name, stage), (seconds, count, peak_mb) in records.items():
+            self.current_file = file_name
+            self.add(stage, seconds, count, table_name, peak_mb)
+        self.current_file = ""
+
+    @contextmanager
+    def measure(self, stage: str, table_name: str = ""):
+        """Measure the time of a block as a stage of the current file."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, 0, table_name)
+
+    def process_stream(self, processor, plans: Union[SchemaPlan, Tuple[SchemaPlan, ...]], stream: BinaryIO):
+        """Run process_data on a JSON stream, splitting its time into extract, parse and flatten.
+
+        The stages of a file with several schemas are recorded without a table name.
+        """
+        reader = _TimedReader(stream)
+        parse_seconds = 0.0
+        num_items = 0
+
+        def timed_items() -> Iterator[Any]:
+            nonlocal parse_seconds, num_items
+            items = iter_json_items(reader)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    parse_seconds += time.perf_counter() - start
+                    return
+                parse_seconds += time.perf_counter() - start
+                num_items += 1
+                yield item
+
+        db_seconds = self.db_seconds
+        start = time.perf_counter()
+        processor.process_data(plans, timed_items())
+        seconds = time.perf_counter() - start
+
+        plans = compile_config(plans)
+        table_name = plans[0].table if len(plans) == 1 else ""
+        self.add("extract", reader.seconds, reader.size, table_name)
+        self.add("parse", parse_seconds - reader.seconds, num_items, table_name)
+        self.add("flatten", seconds - parse_seconds - (self.db_seconds - db_seconds), 0, table_name, peak_memory_mb())
+
+    def finish(self):
+        """Record the total time and peak memory of the import."""
+        self.current_file = ""
+        self.records[("", "", "total")] = [time.perf_counter() - self.started, 0, peak_memory_mb()]
+
+    def to_rows(self) -> List[Tuple[str, str, str, float, int, Optional[float]]]:
+        return [(file_name, table_name, stage, round(seconds, 6), count, peak_mb)
+                for (file_name, table_name, stage), (seconds, count, peak_mb) in self.records.items()]
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Seconds per stage summed over all files and tables."""
+        totals = {}
+        for (_, _, stage), (seconds, _, _) in self.records.items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def save(self, conn: sqlite3.Connection):
+        """Replace the stats table in the output database."""
+        conn.execute(f"DROP TABLE IF EXISTS {STATS_TABLE}")
+        conn.execute(f"""
+            CREATE TABLE {STATS_TABLE} (
+                FileName TEXT, TableName TEXT, Stage TEXT, Seconds REAL, Count INTEGER, PeakMemoryMB REAL)
+        """)
+        conn.executemany(f"INSERT INTO {STATS_TABLE} VALUES (?, ?, ?, ?, ?, ?)", self.to_rows())
+        conn.commit()
+
+    def write_json(self, path: Path):
+        """Write the stats as JSON."""
+        stages = [dict(zip(("file", "table", "stage", "seconds", "count", "peak_memory_mb"), row))
+                  for row in self.to_rows()]
+        totals = {stage: round(seconds, 6) for stage, seconds in self.stage_totals().items()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"totals": totals, "stages": stages}, f, indent=2)
+
+    def print_summary(self):
+        """Print seconds per stage."""
+        totals = self.stage_totals()
+        print("==== Import stats: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in totals.items()))
@@ -1,13 +1,47 @@
+import itertools
 import sqlite3
-from typing import Dict, Any, List, Union
-
-
-def _find_child_data(data: Dict[str, Any], child_key: str):
-    """Find child data in JSON, support nested fields definition using "." """
-    # Direct child
-    keys = child_key.split(".")
+import time
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple, Union
+
+from column_types import ColumnType, coerce_rows, column_definition, empty_null_indexes
+from extraction_plan import DispatchPlan, FilterPlan, FlattenPlan, NestedPlan, SchemaPlan, compile_config, \
+    compile_dispatch
+
+# Number of buffered rows sent to the database in a single executemany call
+DEFAULT_BATCH_SIZE = 5000
+
+# Buffered rows over all tables, in batches, above which every table is flushed
+MAX_PENDING_BATCHES = 4
+
+# PRAGMA settings applied for the duration of a load, "safe" keeps the SQLite defaults
+LOAD_PROFILES: Dict[str, Dict[str, Any]] = {
+    "safe": {},
+    "bulk": {
+        # page_size only takes effect while the database is still empty
+        "page_size": 16384,
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -256000,
+        "temp_store": "MEMORY",
+    },
+}
+
+# Share of free pages above which finish_load rewrites the database
+VACUUM_FREE_RATIO = 0.2
+
+# Settings restored by finish_load after a non-safe profile
+SAFE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+}
+
+
+def _find_child_data(data: Dict[str, Any], key_path: Tuple[str, ...]):
+    """Find child data in JSON following a pre-split nested key path."""
     current = data
-    for key in keys:
+    for key in key_path:
         if isinstance(current, dict) and key in current:
             current = current[key]
         else:
@@ -15,34 +49,181 @@ def _find_child_data(data: Dict[str, Any], child_key: str):
     return current
 
 
-def _matches_filters(data: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-    """Check if data matches filter criteria."""
-    if not filters or filters == {}:
-        return True
-
-    for field, value in filters.items():
+def _nested_items(data: Dict[str, Any], nested: NestedPlan) -> List[Dict[str, Any]]:
+    """Dict items of a nested child, a single dict counts as one item."""
+    nested_data = _find_child_data(data, nested.key_path)
+    if isinstance(nested_data, dict):
+        return [nested_data]
+    if isinstance(nested_data, list):
+        return [item for item in nested_data if isinstance(item, dict)]
+    return []
+
+
+def _explode_item(item: Dict[str, Any], nested: NestedPlan, cartesian: bool
+                  ) -> Iterator[Tuple[Tuple[int, ...], List[Any]]]:
+    """Yield the (slots, values) fragments of a nested item combined with its own nested children."""
+    get = item.get
+    values = [get(field, "") for field in nested.fields]
+    for child_slots, child_values in _explode_nested(item, nested.children, cartesian):
+        yield nested.slots + child_slots, values + child_values
+
+
+def _explode_nested(data: Dict[str, Any], nested_plans: Tuple[NestedPlan, ...], cartesian: bool,
+                    index: int = 0) -> Iterator[Tuple[Tuple[int, ...], List[Any]]]:
+    """Lazily yield one (slots, values) fragment per row of exploded nested children.
+
+    Sibling nested lists are combined into every combination of their items in cartesian mode,
+    otherwise each item of each list is a fragment of its own. Missing or empty lists do not
+    suppress the row, they only leave their columns out.
+    """
+    if cartesian:
+        if index == len(nested_plans):
+            yield (), []
+            return
+        nested = nested_plans[index]
+        items = _nested_items(data, nested)
+        if not items:
+            yield from _explode_nested(data, nested_plans, True, index + 1)
+            return
+        for item in items:
+            for head_slots, head_values in _explode_item(item, nested, True):
+                # The remaining siblings are re-walked per head instead of materialising the product
+                for tail_slots, tail_values in _explode_nested(data, nested_plans, True, index + 1):
+                    yield head_slots + tail_slots, head_values + tail_values
+        return
+
+    produced = False
+    for nested in nested_plans:
+        for item in _nested_items(data, nested):
+            for fragment in _explode_item(item, nested, False):
+                produced = True
+                yield fragment
+    if not produced:
+        yield (), []
+
+
+def _route(dispatch: DispatchPlan, data: Dict[str, Any]) -> Tuple[int, ...]:
+    """Indexes of the schemas a record may match, by the value of the dispatch field."""
+    if dispatch.field is None:
+        return dispatch.default
+    try:
+        return dispatch.routes.get(data.get(dispatch.field), dispatch.default)
+    except TypeError:
+        # Unhashable values only match schemas not filtering on the field
+        return dispatch.default
+
+
+def _matches_filters(data: Dict[str, Any], filters: Tuple[FilterPlan, ...]) -> bool:
+    """Check if data matches compiled filter criteria."""
+    for field, expected, is_set in filters:
         data_value = data.get(field)
 
         # If filter value is a list, check if data value matches any item in the list
-        if isinstance(value, list):
-            if data_value not in value:
-                return False
-        else:
-            # Single value matching (existing behavior)
-            if data_value != value:
+        if is_set:
+            try:
+                if data_value not in expected:
+                    return False
+            except TypeError:
+                # Unhashable values never match a list of scalars
                 return False
+        elif data_value != expected:
+            return False
 
     return True
 
 
-class SimpleJsonProcessor:
-    """Simple JSON to SQL processor."""
+def index_name(table_name: str, columns: Tuple[str, ...]) -> str:
+    """Name of the index on the given columns of a table."""
+    return f"ix_{table_name}_{'_'.join(columns)}"
 
-    def __init__(self, db_connection: sqlite3.Connection):
-        self.conn = db_connection
-        self.cursor = db_connection.cursor()
 
-    def _table_exists(self, table_name: str) -> bool:
+def _transforms_module_id(table_name: str) -> bool:
+    """Check if ModuleId of a table is replaced by ModuleName, modules and temp tables keep it."""
+    return table_name != "modules" and not (len(table_name) > 4 and table_name[:4].lower() == "temp")
+
+
+class TableSink:
+    """Storage a processor writes its tables to, this base class keeps nothing.
+
+    The processor decides the tables, their columns and where ModuleName replaces ModuleId,
+    a sink only carries out the storage calls.
+    """
+
+    # Stage timings, set through the stats of the processor
+    stats = None
+
+    def table_names(self) -> List[str]:
+        """Tables in the storage, including tables kept from an earlier load."""
+        return []
+
+    def table_exists(self, table_name: str) -> bool:
+        return table_name in self.table_names()
+
+    def columns(self, table_name: str) -> List[str]:
+        """Columns of a table in the storage, empty when the table does not exist."""
+        return []
+
+    def create_table(self, table_name: str, columns: List[str], types: Dict[str, ColumnType]):
+        """Create a table, types holds the columns declared in _schema.json."""
+
+    def add_column(self, table_name: str, column: str, column_type: Optional[ColumnType]):
+        """Add a column to an existing table."""
+
+    def insert_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[List[Any]]):
+        """Write a batch of rows whose values follow the given column order."""
+
+    def drop_table(self, table_name: str):
+        """Drop a table together with the indexes built on it."""
+
+    def module_rows(self) -> List[Tuple[Any, Any]]:
+        """Read the (ModuleId, ModuleName) rows of the modules table."""
+        return []
+
+    def replace_module_id(self, table_names: List[str]):
+        """Replace ModuleId with ModuleName of the modules table as first column of the given tables."""
+
+    def create_indexes(self, indexes: Dict[str, List[Tuple[str, ...]]]) -> Dict[str, float]:
+        """Create indexes on column tuples per table and return the build time of each."""
+        return {}
+
+    def create_fulltext_indexes(self, columns: Dict[str, List[str]]) -> Dict[str, float]:
+        """Create a full-text index over text columns per table and return the build time of each."""
+        return {}
+
+    def commit(self):
+        """Make all written rows durable."""
+
+    def finish(self):
+        """Complete the storage once the rows and indexes are written."""
+
+    def close(self):
+        """Release the storage, also after a failed load."""
+
+
+class SqliteSink(TableSink):
+    """Sink writing into a SQLite database, under the PRAGMA settings of a load profile until finish."""
+
+    def __init__(self, conn: sqlite3.Connection, profile: str = "safe"):
+        if profile not in LOAD_PROFILES:
+            raise ValueError(f"Unknown load profile: {profile}")
+
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.profile = profile
+        # Prepared INSERT statements keyed by (table, column tuple)
+        self._insert_statements: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+        self.apply_pragmas(LOAD_PROFILES[profile])
+
+    def apply_pragmas(self, pragmas: Dict[str, Any]):
+        """Apply PRAGMA settings on the connection."""
+        for name, value in pragmas.items():
+            self.cursor.execute(f"PRAGMA {name} = {value}")
+
+    def table_names(self) -> List[str]:
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def table_exists(self, table_name: str) -> bool:
         """Check if table exists in database."""
         self.cursor.execute("""
                             SELECT name 
@@ -51,54 +232,46 @@ class SimpleJsonProcessor:
                               AND name = ?;""", (table_name,))
         return self.cursor.fetchone() is not None
 
-    def _create_table(self, table_name: str, fields: List[str], parent_id: str = None):
-        """Create a table with the specified fields."""
-        if self._table_exists(table_name):
-            return
-
-        columns = [f"{field} TEXT" for field in fields]
-        if parent_id and parent_id not in fields:
-            print(f"parent_id {parent_id} added to fields")
-            columns.append(f"{parent_id} TEXT")
-
-        sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns)})"
-        self.cursor.execute(sql)
-        print(f"  == Created table: {table_name} with fields: [{', '.join(columns)}]")
-        
-    def _alter_table(self, table_name: str, fields: List[str]):
-        """Add new fields to existing table."""
-        # Get existing columns
+    def columns(self, table_name: str) -> List[str]:
         self.cursor.execute(f"PRAGMA table_info({table_name})")
-        existing_columns = {row[1] for row in self.cursor.fetchall()}
-
-        # Add new columns if they don't exist
-        for field in fields:
-            if field not in existing_columns:
-                sql = f"ALTER TABLE {table_name} ADD COLUMN {field} TEXT"
-                self.cursor.execute(sql)
-                print(f"    == Added column {field} to table {table_name}")
-
-    def _insert_data(self, table_name: str, fields: List[str], data: Dict[str, Any], parent_id: str = None):
-        """Insert data into table."""
-        values = {}
+        return [row[1] for row in self.cursor.fetchall()]
+
+    def create_table(self, table_name: str, columns: List[str], types: Dict[str, ColumnType]):
+        definitions = [column_definition(column, types.get(column)) for column in columns]
+        self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(definitions)})")
+
+    def add_column(self, table_name: str, column: str, column_type: Optional[ColumnType]):
+        start = time.perf_counter()
+        self.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_definition(column, column_type)}")
+        if self.stats is not None:
+            self.stats.add("alter", time.perf_counter() - start, 1, table_name)
+
+    def _get_insert_statement(self, table_name: str, columns: Tuple[str, ...]) -> str:
+        """Get cached INSERT statement for table and column tuple."""
+        key = (table_name, columns)
+        sql = self._insert_statements.get(key)
+        if sql is None:
+            placeholders = ', '.join(['?' for _ in columns])
+            sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+            self._insert_statements[key] = sql
+        return sql
 
-        if parent_id:
-            fields.append(parent_id)
+    def insert_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[List[Any]]):
+        start = time.perf_counter()
+        self.cursor.executemany(self._get_insert_statement(table_name, columns), rows)
+        if self.stats is not None:
+            self.stats.add("insert", time.perf_counter() - start, len(rows), table_name)
 
-        # Add regular fields
-        for field in fields:
-            values[field] = data.get(field, "")
+    def drop_table(self, table_name: str):
+        self.cursor.execute(f"DROP TABLE IF EXISTS {table_name}_fts")
+        self.cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
 
-        if values:
-            columns = list(values.keys())
-            placeholders = ', '.join(['?' for _ in columns])
-            sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
-            self.cursor.execute(sql, list(values.values()))
-            
-            
-    def transform_module_id(self):
-        """Transform all tables to replace ModuleId with ModuleName and move it to first column."""
+    def module_rows(self) -> List[Tuple[Any, Any]]:
+        self.cursor.execute("SELECT ModuleId, ModuleName FROM modules")
+        return self.cursor.fetchall()
 
+    def replace_module_id(self, table_names: List[str]):
+        """Rewrite the tables joined with a temporary ModuleId -> ModuleName lookup table."""
         # Step 1: Create temporary table with ModuleId and ModuleName
         temp_table = "temp_module_lookup"
         self.cursor.execute(f"DROP TABLE IF EXISTS {temp_table}")
@@ -109,51 +282,31 @@ class SimpleJsonProcessor:
         """)
         print(f"  == Created temporary lookup table: {temp_table}")
 
-        # Step 2: Get all table names except modules
-        self.cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type = 'table' 
-            AND name != 'modules'
-            AND name NOT LIKE 'temp_%'
-            AND name NOT LIKE 'sqlite_%'
-        """)
-
-        tables_to_transform = [row[0] for row in self.cursor.fetchall()]
-        print(f"  == Tables to transform: {tables_to_transform}")
-
-        # Step 3: Transform each table
-        for table_name in tables_to_transform:
+        # Step 2: Transform each table
+        for table_name in table_names:
             self._transform_single_table(table_name, temp_table)
 
-        # Step 4: Drop temporary table
+        # Step 3: Drop temporary table
         self.cursor.execute(f"DROP TABLE {temp_table}")
         print("  == Dropped temporary lookup table")
         self.conn.commit()
-        
-        
 
     def _transform_single_table(self, table_name: str, temp_table: str):
         """Transform a single table to replace ModuleId with ModuleName."""
 
-        # Get table structure
+        # Get all column names and declared types except ModuleId
         self.cursor.execute(f"PRAGMA table_info({table_name})")
         columns_info = self.cursor.fetchall()
-
-        # Check if table has ModuleId column
-        has_module_id = any(col[1] == 'ModuleId' for col in columns_info)
-        if not has_module_id:
-            print(f"    == Table {table_name} does not have ModuleId column, skipping")
-            return
-
-        # Get all column names except ModuleId
         other_columns = [col[1] for col in columns_info if col[1] != 'ModuleId']
+        other_types = [col[2] or 'TEXT' for col in columns_info if col[1] != 'ModuleId']
 
         # Create new table name
         new_table_name = f"{table_name}_new"
 
         # Build column list with ModuleName first, then other columns
         new_columns = ['ModuleName'] + other_columns
-        column_definitions = [f"{col} TEXT" for col in new_columns]
+        column_definitions = ['ModuleName TEXT'] + [f"{col} {col_type}"
+                                                    for col, col_type in zip(other_columns, other_types)]
 
         # Create new table
         self.cursor.execute(f"DROP TABLE IF EXISTS {new_table_name}")
@@ -178,148 +331,534 @@ class SimpleJsonProcessor:
         self.cursor.execute(f"DROP TABLE {table_name}")
         self.cursor.execute(f"ALTER TABLE {new_table_name} RENAME TO {table_name}")
 
-        print(f"    == Transformed table {table_name}: replaced ModuleId with ModuleName as first column")
+    def create_indexes(self, indexes: Dict[str, List[Tuple[str, ...]]]) -> Dict[str, float]:
+        timings = {}
+        for table_name, column_tuples in indexes.items():
+            for columns in column_tuples:
+                name = index_name(table_name, columns)
+                start = time.perf_counter()
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} ({', '.join(columns)})")
+                timings[name] = time.perf_counter() - start
+        return timings
+
+    def create_fulltext_indexes(self, columns: Dict[str, List[str]]) -> Dict[str, float]:
+        """Create FTS5 trigram shadow indexes and return their build times.
+
+        Each index is an external-content table named <table>_fts that shares rowids with
+        its table, so LIKE '%text%' and MATCH on it are served by the trigram index.
+        """
+        timings = {}
+        for table_name, table_columns in columns.items():
+            fts_table = f"{table_name}_fts"
+            start = time.perf_counter()
+            try:
+                self.cursor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+                self.cursor.execute(f"""
+                    CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                        {', '.join(table_columns)}, content='{table_name}', tokenize='trigram')
+                """)
+                self.cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+            except sqlite3.OperationalError as e:
+                # FTS5 or its trigram tokenizer is not compiled into this SQLite build
+                print(f"    == Skipped full-text index {fts_table}: {e}")
+                continue
+            timings[fts_table] = time.perf_counter() - start
+        return timings
+
+    def commit(self):
+        self.conn.commit()
+
+    def finish(self):
+        """Refresh planner statistics, restore safe settings and reclaim free pages."""
+        self.conn.commit()
+        self.cursor.execute("ANALYZE")
+        self.conn.commit()
+
+        # The database is durable again before the final rewrite and close
+        if LOAD_PROFILES[self.profile]:
+            self.apply_pragmas(SAFE_PRAGMAS)
+            print(f"  == Restored safe settings after {self.profile} load")
+
+        # Pages freed by transform_module_id or dropped tables are only worth a full rewrite in bulk
+        self.cursor.execute("PRAGMA freelist_count")
+        free_pages = self.cursor.fetchone()[0]
+        self.cursor.execute("PRAGMA page_count")
+        if free_pages > self.cursor.fetchone()[0] * VACUUM_FREE_RATIO:
+            self.cursor.execute("VACUUM")
+            print(f"  == Vacuumed database, reclaimed {free_pages} pages")
+
+
+class SimpleJsonProcessor:
+    """Simple JSON to SQL processor.
+
+    Rows are written through a sink, a SQLite database unless another sink is given.
+    """
+
+    def __init__(self, db_connection: Optional[sqlite3.Connection], batch_size: int = DEFAULT_BATCH_SIZE,
+                 profile: str = "safe", verbose: bool = True,
+                 column_types: Optional[Dict[str, Dict[str, ColumnType]]] = None, sink: Optional[TableSink] = None):
+        if sink is None:
+            sink = SqliteSink(db_connection, profile) if db_connection is not None else TableSink()
+        self.sink = sink
+        self.conn = db_connection
+        self.batch_size = max(1, batch_size)
+        # Quiet mode skips the per-table and per-column progress lines
+        self.verbose = verbose
+
+        # Rows waiting to be written per table, with the column tuple they follow
+        self._pending: Dict[str, Tuple[Tuple[str, ...], List[List[Any]]]] = {}
+        self._pending_count = 0
+        # Column types per table derived from _schema.json, other columns are TEXT
+        self.column_types = column_types or {}
+        # Positions of the columns whose "" values become NULL, keyed by (table, column tuple)
+        self._null_indexes: Dict[Tuple[str, Tuple[str, ...]], List[int]] = {}
+        # Known columns per table, kept in sync by _create_table and _alter_table
+        self._table_columns: Dict[str, Set[str]] = {}
+        # ModuleId -> ModuleName lookup, available once the modules table is loaded
+        self.module_names: Optional[Dict[str, str]] = None
+        # Tables written with ModuleName resolved during insert
+        self._fused_tables: Set[str] = set()
+        # Indexes to build once the load is finished, per table
+        self._index_specs: Dict[str, Dict[Tuple[str, ...], None]] = {}
+        # Text columns to cover with a full-text index, per table
+        self._fulltext_specs: Dict[str, Dict[str, None]] = {}
+        # Tables whose exploded rows were cut off at explode_limit, reported once
+        self._capped_tables: Set[str] = set()
+        # Column layout last checked by _alter_table per flattened table
+        self._checked_layouts: Dict[str, Tuple[str, ...]] = {}
+
+    @property
+    def stats(self):
+        """Stage timings of the import, set by the caller when collected."""
+        return self.sink.stats
+
+    @stats.setter
+    def stats(self, stats):
+        self.sink.stats = stats
+
+    @property
+    def tables(self) -> List[str]:
+        """Tables written or read by this load, in order of first use."""
+        return list(self._table_columns)
+
+    def finish_load(self):
+        """Write the remaining rows, build the indexes and complete the storage."""
+        self.flush()
+        self.sink.commit()
+
+        # Indexes are cheapest to build once all rows are in place, still under the load profile
+        self.build_indexes()
+        self.build_fulltext_indexes()
+        self.sink.finish()
+
+    def close(self):
+        """Release the storage after a failed load."""
+        self.sink.close()
+
+    def drop_table(self, table_name: str):
+        """Drop a table together with its full-text index."""
+        self.flush()
+        self.sink.drop_table(table_name)
+        self._table_columns.pop(table_name, None)
+        self._checked_layouts.pop(table_name, None)
+        self._fused_tables.discard(table_name)
+        print(f"  == Dropped table: {table_name}")
+
+    def register_indexes(self, plan: SchemaPlan):
+        """Remember the indexes of a schema and its parent_id children for build_indexes."""
+        if plan.indexes:
+            self._index_specs.setdefault(plan.table, {}).update(dict.fromkeys(plan.indexes))
+        if plan.fulltext:
+            self._fulltext_specs.setdefault(plan.table, {}).update(dict.fromkeys(plan.fulltext))
+        for child in plan.children:
+            if child.schema is not None:
+                self.register_indexes(child.schema)
+
+    def build_indexes(self) -> Dict[str, float]:
+        """Create all registered indexes and return the build time of each."""
+        self.flush()
+        buildable: Dict[str, List[Tuple[str, ...]]] = {}
+        for table_name, indexes in self._index_specs.items():
+            if table_name not in self._table_columns and not self._table_exists(table_name):
+                continue
+            existing_columns = self._known_columns(table_name)
+
+            for columns in indexes:
+                if all(column in existing_columns for column in columns):
+                    buildable.setdefault(table_name, []).append(columns)
+                elif self.verbose:
+                    print(f"    == Skipped index on {table_name} ({', '.join(columns)}), column not found")
+
+        timings = self.sink.create_indexes(buildable)
+        if self.verbose:
+            for name, seconds in timings.items():
+                print(f"  == Created index {name} in {seconds:.3f}s")
+        return timings
+
+    def build_fulltext_indexes(self) -> Dict[str, float]:
+        """Create full-text indexes over the registered text columns and return their build times."""
+        self.flush()
+        fulltext: Dict[str, List[str]] = {}
+        for table_name, columns in self._fulltext_specs.items():
+            if table_name not in self._table_columns and not self._table_exists(table_name):
+                continue
+            existing_columns = self._known_columns(table_name)
+            columns = [column for column in columns if column in existing_columns]
+            if columns:
+                fulltext[table_name] = columns
+
+        timings = self.sink.create_fulltext_indexes(fulltext)
+        if self.verbose:
+            for name, seconds in timings.items():
+                print(f"  == Created full-text index {name} in {seconds:.3f}s")
+        return timings
+
+    def _table_exists(self, table_name: str) -> bool:
+        """Check if table exists in the storage."""
+        return self.sink.table_exists(table_name)
+
+    def _create_table(self, table_name: str, fields: List[str], parent_id: str = None):
+        """Create a table with the specified fields."""
+        if table_name in self._table_columns or self._table_exists(table_name):
+            return
+
+        if self._resolves_module_name(table_name, fields):
+            # ModuleName replaces ModuleId as first column, as transform_module_id would do
+            fields = ["ModuleName"] + [field for field in fields if field != "ModuleId"]
+            self._fused_tables.add(table_name)
+
+        columns = list(fields)
+        if parent_id and parent_id not in fields:
+            if self.verbose:
+                print(f"parent_id {parent_id} added to fields")
+            columns.append(parent_id)
+
+        types = self.column_types.get(table_name, {})
+        self.sink.create_table(table_name, columns, types)
+        self._table_columns[table_name] = set(columns)
+        if self.verbose:
+            definitions = [column_definition(column, types.get(column)) for column in columns]
+            print(f"  == Created table: {table_name} with fields: [{', '.join(definitions)}]")
+
+    def _resolves_module_name(self, table_name: str, fields: List[str]) -> bool:
+        """Check if ModuleId of a new table can be resolved to ModuleName while inserting."""
+        if self.module_names is None or "ModuleId" not in fields:
+            return False
+        # Same tables transform_module_id leaves alone
+        return _transforms_module_id(table_name)
+
+    def load_module_names(self) -> bool:
+        """Load the ModuleId -> ModuleName lookup from the modules table.
+
+        Tables created afterwards get ModuleName written directly, only tables loaded
+        before are left for transform_module_id.
+        """
+        module_names = {}
+        for module_id, module_name in self._fetch_module_rows():
+            if module_names.setdefault(module_id, module_name) != module_name:
+                # Ambiguous ids duplicate rows in the transform join, keep that behaviour
+                print(f"  == Duplicate ModuleId {module_id}, ModuleName is resolved after import")
+                return False
+        self.module_names = module_names
+        return True
+
+    def _fetch_module_rows(self) -> List[Tuple[Any, Any]]:
+        """Read the (ModuleId, ModuleName) rows of the modules table."""
+        self.flush()
+        return self.sink.module_rows()
+
+    def _known_columns(self, table_name: str) -> Set[str]:
+        """Get registered columns of a table, reading the schema only the first time."""
+        columns = self._table_columns.get(table_name)
+        if columns is None:
+            columns = self._table_columns[table_name] = set(self.sink.columns(table_name))
+        return columns
+
+    def _alter_table(self, table_name: str, fields: List[str]):
+        """Add new fields to existing table."""
+        existing_columns = self._known_columns(table_name)
+        fused = table_name in self._fused_tables
 
-    def process_data(self, config: Union[Dict[str, Any], List[Dict[str, Any]]], json_data: Union[Dict, List]):
-        """Process JSON data according to configuration(s)."""
+        # Add new columns if they don't exist
+        for field in fields:
+            if field not in existing_columns and not (fused and field == "ModuleId"):
+                self._add_column(table_name, field)
+                existing_columns.add(field)
+
+    def _add_column(self, table_name: str, field: str):
+        """Add a single column to table."""
+        self.sink.add_column(table_name, field, self.column_types.get(table_name, {}).get(field))
+        if self.verbose:
+            print(f"    == Added column {field} to table {table_name}")
+
+    def _insert_row(self, table_name: str, columns: Tuple[str, ...], values: List[Any]):
+        """Buffer a row for insertion into table, values follow the column order."""
+        if not columns:
+            return
+
+        # Rows of a table keep their order, other tables keep their buffers
+        pending = self._pending.get(table_name)
+        if pending is None or pending[0] != columns:
+            if pending is not None:
+                self._flush_table(table_name)
+            pending = self._pending[table_name] = (columns, [])
+
+        pending[1].append(values)
+        self._pending_count += 1
+        if len(pending[1]) >= self.batch_size:
+            self._flush_table(table_name)
+        elif self._pending_count >= self.batch_size * MAX_PENDING_BATCHES:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows to the sink."""
+        for table_name in list(self._pending):
+            self._flush_table(table_name)
+
+    def _flush_table(self, table_name: str):
+        """Write the buffered rows of a table."""
+        columns, rows = self._pending.pop(table_name)
+        self._pending_count -= len(rows)
+        self.insert_rows(table_name, columns, rows)
+
+    def insert_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[List[Any]]):
+        """Insert a batch of rows whose values follow the given column order."""
+        columns = self._prepare_rows(table_name, columns, rows)
+        self.sink.insert_rows(table_name, columns, rows)
+
+    def _prepare_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[List[Any]]) -> Tuple[str, ...]:
+        """Coerce typed values and resolve ModuleName in place, returns the columns to write."""
+        if table_name in self.column_types:
+            key = (table_name, columns)
+            null_indexes = self._null_indexes.get(key)
+            if null_indexes is None:
+                null_indexes = self._null_indexes[key] = empty_null_indexes(columns, self.column_types[table_name])
+            if null_indexes:
+                coerce_rows(rows, null_indexes)
+        if table_name in self._fused_tables and "ModuleId" in columns:
+            index = columns.index("ModuleId")
+            columns = columns[:index] + ("ModuleName",) + columns[index + 1:]
+            get = self.module_names.get
+            for row in rows:
+                module_id = row[index]
+                row[index] = get(module_id if module_id is None or isinstance(module_id, str) else str(module_id))
+        return columns
+
+    def transform_module_id(self):
+        """Transform all tables to replace ModuleId with ModuleName and move it to first column."""
+        self.flush()
+        if not self._table_exists("modules"):
+            print("  == No modules table, ModuleId is kept")
+            return
+
+        # Tables loaded after modules already have ModuleName, only the rest are rewritten
+        tables_to_transform = [table_name for table_name in self.sink.table_names()
+                               if _transforms_module_id(table_name) and table_name not in self._fused_tables
+                               and "ModuleId" in (self._table_columns.get(table_name) or self.sink.columns(table_name))]
+        print(f"  == Tables to transform: {tables_to_transform}")
+        self.sink.replace_module_id(tables_to_transform)
+
+        for table_name in tables_to_transform:
+            columns = self._table_columns.get(table_name)
+            if columns is not None:
+                columns.discard("ModuleId")
+                columns.add("ModuleName")
+            if self.verbose:
+                print(f"    == Transformed table {table_name}: replaced ModuleId with ModuleName as first column")
+
+
+    def process_data(self, config: Union[Dict[str, Any], List[Dict[str, Any]], SchemaPlan, Tuple[SchemaPlan, ...]],
+                     json_data: Union[Dict, List, Iterator]):
+        """Process JSON data according to configuration(s) or their compiled plans."""
         # Handle multiple schema definitions for the same file
-        if isinstance(config, list):
-            for schema_config in config:
-                self._process_single_schema(schema_config, json_data)
-        else:
-            self._process_single_schema(config, json_data)
+        plans = compile_config(config)
+        for plan in plans:
+            self.register_indexes(plan)
+        self._process_schemas(plans, json_data)
+        self.flush()
+
+    def prepare_tables(self, config: Union[Dict[str, Any], List[Dict[str, Any]], SchemaPlan, Tuple[SchemaPlan, ...]],
+                       json_data: Union[Dict, List, Iterator]):
+        """First pass of two-pass loading: create tables with every column the data will need.
+
+        The data is flattened without writing rows, so the following process_data call
+        neither queries the schema nor alters any table.
+        """
+        collector = _ColumnCollector()
+        collector._process_schemas(compile_config(config), json_data)
+
+        # Existing tables only get the columns they are missing
+        for table_name, columns in collector.columns.items():
+            self._create_table(table_name, list(columns))
+            self._alter_table(table_name, list(columns))
+
+    def _process_schemas(self, plans: Tuple[SchemaPlan, ...], json_data: Union[Dict, List, Iterator]):
+        """Process JSON data for all schemas of a file in a single pass over the records."""
+        if len(plans) == 1:
+            self._process_single_schema(plans[0], json_data)
+            return
 
-    def _process_single_schema(self, config: Dict[str, Any], json_data: Union[Dict, List]):
-        """Process JSON data according to a single configuration schema."""
-        table_name = config["table"]
-        fields = config.get("fields", [])
-        children = config.get("children", {})
-        parent_id = config.get("parent_id")
-        filters = config.get("filters", {})
+        dispatch = compile_dispatch(plans)
+        for plan in plans:
+            self._create_table(plan.table, list(plan.fields), plan.parent_id)
 
+        if isinstance(json_data, dict):
+            json_data = [json_data]
+        elif not isinstance(json_data, (list, Iterator)):
+            return
+        for item in json_data:
+            if isinstance(item, dict):
+                for index in _route(dispatch, item):
+                    if _matches_filters(item, dispatch.filters[index]):
+                        self._process_single_item(plans[index], item)
+
+    def _process_single_schema(self, plan: SchemaPlan, json_data: Union[Dict, List, Iterator]):
+        """Process JSON data according to a single schema plan."""
         # Create table
-        self._create_table(table_name, fields, parent_id)
+        self._create_table(plan.table, list(plan.fields), plan.parent_id)
 
-        # Handle list of items
-        if isinstance(json_data, list):
+        # Handle list of items, either loaded or streamed one record at a time
+        if isinstance(json_data, (list, Iterator)):
+            filters = plan.filters
             for item in json_data:
                 if isinstance(item, dict) and _matches_filters(item, filters):
-                    self._process_single_item(table_name, fields, children, item, parent_id)
+                    self._process_single_item(plan, item)
 
         # Handle single item
-        elif isinstance(json_data, dict) and _matches_filters(json_data, filters):
-            self._process_single_item(table_name, fields, children, json_data, parent_id)
+        elif isinstance(json_data, dict) and _matches_filters(json_data, plan.filters):
+            self._process_single_item(plan, json_data)
 
-    def _process_single_item(self, table_name: str, fields: List[str], children: Dict[str, Any], 
-                           data: Dict[str, Any], parent_id: str):
+    def _process_single_item(self, plan: SchemaPlan, data: Dict[str, Any]):
         """Process a single data item."""
+        get = data.get
+
         # Process children if they exist
-        if children:
-            for child_key, child_config in children.items():
-                child_data = _find_child_data(data, child_key)
+        if plan.children:
+            parent_values = None
+            for child in plan.children:
+                child_data = _find_child_data(data, child.key_path)
 
                 if child_data is not None:
-                    if child_config.get("parent_id"):
-                        self._insert_data(table_name, fields, data, parent_id)
+                    if child.schema is not None:
+                        self._insert_row(plan.table, plan.columns, [get(field, "") for field in plan.columns])
                         # Recursively process child data
-                        self.process_data(child_config, child_data)
+                        self._process_single_schema(child.schema, child_data)
                     else:
                         # No parent relationship - flatten into child's own table
-                        self._flatten_child_data(child_key, child_config, child_data, data, fields)
+                        if parent_values is None:
+                            parent_values = [get(field, "") for field in plan.fields]
+                        self._flatten_child_data(child.flatten, child_data, parent_values)
         else:
-            self._insert_data(table_name, fields, data, parent_id)
+            self._insert_row(plan.table, plan.columns, [get(field, "") for field in plan.columns])
 
-    def _flatten_child_data(self, child_key: str, child_config: Dict[str, Any], child_data: Union[Dict, List],
-                            parent_data: Dict[str, Any], parent_fields: List[str]):
+    def _flatten_child_data(self, flatten: FlattenPlan, child_data: Union[Dict, List], parent_values: List[Any]):
         """Flatten child data into a new table when no parent_id is defined."""
-        parent_table = child_config["table"]
-        child_fields = child_config.get("fields", [])
-        nested_children = child_config.get("children", {})
-
-        # Sanitize child_key for use in SQL column names
-        sanitized_child_key = child_key.replace(".", "_").replace("-", "_").replace(" ", "_")
-
-        # Collect all fields including nested ones
-        all_flattened_fields = []
-
-        if isinstance(child_data, list):
-            for item in child_data:
-                if isinstance(item, dict):
-                    # Start with parent data
-                    flattened = {**parent_data}
-                    current_fields = list(parent_fields)
-
-                    # Add current level fields
-                    for field in child_fields:
-                        prefixed_field = f"{sanitized_child_key}_{field}"
-                        flattened[prefixed_field] = item.get(field, "")
-                        if prefixed_field not in current_fields:
-                            current_fields.append(prefixed_field)
-
-                    # Recursively flatten nested children
-                    self._flatten_nested_data(item, nested_children, flattened, current_fields, sanitized_child_key)
-
-                    # Ensure table has all necessary columns
-                    self._alter_table(parent_table, current_fields)
-
-                    # Insert the fully flattened row
-                    self._insert_data(parent_table, current_fields, flattened)
-
-        elif isinstance(child_data, dict):
-            # Start with parent data
-            flattened = {**parent_data}
-            current_fields = list(parent_fields)
-
-            # Add current level fields
-            for field in child_fields:
-                prefixed_field = f"{sanitized_child_key}_{field}"
-                flattened[prefixed_field] = child_data.get(field, "")
-                if prefixed_field not in current_fields:
-                    current_fields.append(prefixed_field)
+        if isinstance(child_data, dict):
+            child_data = [child_data]
+        elif not isinstance(child_data, list):
+            return
 
-            # Recursively flatten nested children
-            self._flatten_nested_data(child_data, nested_children, flattened, current_fields, sanitized_child_key)
+        base_columns = flatten.base_columns
+        for item in child_data:
+            if not isinstance(item, dict):
+                continue
 
-            # Ensure table has all necessary columns
-            self._alter_table(parent_table, current_fields)
+            # Start with parent values, then add current level fields
+            get = item.get
+            values = parent_values + [get(field, "") for field in flatten.fields]
 
-            # Insert the fully flattened row
-            self._insert_data(parent_table, current_fields, flattened)
+            if flatten.nested and flatten.explode != "first":
+                self._explode_child_item(flatten, item, values)
+                continue
 
-    def _flatten_nested_data(self, data: Dict[str, Any], nested_children: Dict[str, Any], 
-                           flattened: Dict[str, Any], current_fields: List[str], parent_prefix: str):
+            # Recursively flatten nested children
+            columns = base_columns
+            if flatten.nested:
+                nested_columns = []
+                self._flatten_nested_data(item, flatten.nested, nested_columns, values)
+                if nested_columns:
+                    columns = base_columns + tuple(column for chunk in nested_columns for column in chunk)
+            self._write_flattened_row(flatten, columns, values)
+
+    def _explode_child_item(self, flatten: FlattenPlan, item: Dict[str, Any], base_values: List[Any]):
+        """Write one row per exploded nested item or combination, at most explode_limit rows."""
+        # Every row gets all nested columns, so consecutive rows share one insert batch
+        columns = flatten.exploded_columns
+        padding = [None] * len(flatten.nested_columns)
+        fragments = _explode_nested(item, flatten.nested, flatten.explode == "cartesian")
+        for num_rows, (fragment_slots, fragment_values) in enumerate(itertools.islice(fragments,
+                                                                                      flatten.explode_limit + 1)):
+            if num_rows == flatten.explode_limit:
+                if self.verbose and flatten.table not in self._capped_tables:
+                    self._capped_tables.add(flatten.table)
+                    print(f"    == Capped exploded rows of {flatten.table} at {flatten.explode_limit} per item")
+                break
+            if flatten.has_overlap:
+                # Padding would overwrite parent values with NULL, only provided columns are written
+                fragment_columns = tuple(columns[slot] for slot in fragment_slots)
+                self._write_flattened_row(flatten, flatten.base_columns + fragment_columns,
+                                          base_values + fragment_values)
+                continue
+            # Values are placed by slot into a copy of the parent prefix, later values win
+            row = base_values + padding
+            for slot, value in zip(fragment_slots, fragment_values):
+                row[slot] = value
+            self._write_flattened_row(flatten, columns, row)
+
+    def _write_flattened_row(self, flatten: FlattenPlan, columns: Tuple[str, ...], values: List[Any]):
+        """Write a flattened row, adding any columns the table is missing."""
+        if flatten.has_overlap:
+            # Later values win while columns keep their first position
+            row = dict(zip(columns, values))
+            columns, values = tuple(row), list(row.values())
+
+        # Ensure table has all necessary columns, rows of the last checked layout need no check
+        if self._checked_layouts.get(flatten.table) != columns:
+            self._alter_table(flatten.table, columns)
+            self._checked_layouts[flatten.table] = columns
+
+        # Insert the fully flattened row
+        self._insert_row(flatten.table, columns, values)
+
+    def _flatten_nested_data(self, data: Dict[str, Any], nested_plans: Tuple[NestedPlan, ...],
+                             columns: List[Tuple[str, ...]], values: List[Any]):
         """Recursively flatten nested children data into the same record."""
-        for nested_key, nested_config in nested_children.items():
-            nested_data = _find_child_data(data, nested_key)
-            if nested_data is not None:
-                nested_fields = nested_config.get("fields", [])
-                sanitized_nested_key = f"{parent_prefix}_{nested_key}".replace(".", "_").replace("-", "_").replace(" ", "_")
-
-                if isinstance(nested_data, dict):
-                    # Add nested fields to the same flattened record
-                    for field in nested_fields:
-                        prefixed_field = f"{sanitized_nested_key}_{field}"
-                        flattened[prefixed_field] = nested_data.get(field, "")
-                        if prefixed_field not in current_fields:
-                            current_fields.append(prefixed_field)
-
-                    # Continue recursively if there are deeper nested children
-                    deeper_children = nested_config.get("children", {})
-                    if deeper_children:
-                        self._flatten_nested_data(nested_data, deeper_children, flattened, current_fields, sanitized_nested_key)
-
-                elif isinstance(nested_data, list):
-                    # For lists, we'll take the first item for now (could be enhanced to handle multiple items)
-                    for item in nested_data:
-                        if isinstance(item, dict):
-                            for field in nested_fields:
-                                prefixed_field = f"{sanitized_nested_key}_{field}"
-                                flattened[prefixed_field] = item.get(field, "")
-                                if prefixed_field not in current_fields:
-                                    current_fields.append(prefixed_field)
-
-                            # Continue recursively if there are deeper nested children
-                            deeper_children = nested_config.get("children", {})
-                            if deeper_children:
-                                self._flatten_nested_data(item, deeper_children, flattened, current_fields, sanitized_nested_key)
-                            break  # Only process first item for now
+        for nested in nested_plans:
+            nested_data = _find_child_data(data, nested.key_path)
+
+            if isinstance(nested_data, list):
+                # For lists, we'll take the first item for now (could be enhanced to handle multiple items)
+                nested_data = next((item for item in nested_data if isinstance(item, dict)), None)
+
+            if isinstance(nested_data, dict):
+                # Add nested fields to the same flattened record
+                get = nested_data.get
+                columns.append(nested.columns)
+                values.extend([get(field, "") for field in nested.fields])
+
+                # Continue recursively if there are deeper nested children
+                if nested.children:
+                    self._flatten_nested_data(nested_data, nested.children, columns, values)
+
+
+class _ColumnCollector(SimpleJsonProcessor):
+    """Processor that records the columns each table needs, in order of appearance, without writing."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.columns: Dict[str, Dict[str, None]] = {}
+
+    def _create_table(self, table_name: str, fields: List[str], parent_id: str = None):
+        if table_name not in self.columns:
+            self.columns[table_name] = dict.fromkeys(list(fields) + ([parent_id] if parent_id else []))
+            self._table_columns[table_name] = set(self.columns[table_name])
+
+    def _known_columns(self, table_name: str) -> Set[str]:
+        self.columns.setdefault(table_name, {})
+        return self._table_columns.setdefault(table_name, set())
+
+    def _add_column(self, table_name: str, field: str):
+        self.columns[table_name][field] = None
+
+    def _insert_row(self, table_name: str, columns: Tuple[str, ...], values: List[Any]):
+        pass
@@ -0,0 +1,120 @@
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Callable, Iterator, Optional
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Number of bytes read from the source per chunk
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _PrefixedReader:
+    """Binary reader that replays already consumed bytes before the rest of the stream."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.prefix:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data = self.prefix + self.stream.read()
+            self.prefix = b""
+            return data
+        data, self.prefix = self.prefix[:size], self.prefix[size:]
+        return data
+
+
+def iter_json_items(stream: BinaryIO, use_ijson: bool = True) -> Iterator[Any]:
+    """Yield top-level array elements from a binary JSON stream one at a time.
+
+    A top-level value that is not an array is yielded as a single item, so callers
+    can treat every file as a sequence of records. ijson is used when installed,
+    otherwise records are decoded from a chunked buffer.
+    """
+    head = stream.read(CHUNK_SIZE)
+    while head and not head.lstrip():
+        head = stream.read(CHUNK_SIZE)
+    is_array = head.lstrip()[:1] == b"["
+
+    if use_ijson and ijson is not None:
+        prefix = "item" if is_array else ""
+        yield from ijson.items(_PrefixedReader(head, stream), prefix, use_float=True)
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read_more(size: int) -> Optional[str]:
+        """Decoded text of the next chunk, None at the end of the stream.
+
+        The end is detected on the raw bytes, a chunk holding only part of a
+        multi-byte character decodes to an empty string.
+        """
+        chunk = stream.read(size)
+        if not chunk:
+            decoder.decode(b"", final=True)
+            return None
+        return decoder.decode(chunk)
+
+    text = decoder.decode(head)
+    if not is_array:
+        # Single record files are decoded as a whole
+        parts = [text]
+        chunk = read_more(CHUNK_SIZE)
+        while chunk is not None:
+            parts.append(chunk)
+            chunk = read_more(CHUNK_SIZE)
+        yield json.loads("".join(parts))
+        return
+
+    yield from _iter_array_items(text, read_more)
+
+
+def _iter_array_items(text: str, read_more: Callable[[int], Optional[str]]) -> Iterator[Any]:
+    """Decode array elements from text, pulling more input whenever a record is incomplete."""
+    decoder = json.JSONDecoder()
+    pos = text.index("[") + 1
+    read_size = CHUNK_SIZE
+    eof = False
+
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        if pos < len(text):
+            char = text[pos]
+            if char == "]":
+                return
+            if char == ",":
+                pos += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+
+            # A value ending exactly at the buffer end may continue in the next chunk
+            if end is not None and (end < len(text) or eof):
+                yield item
+                pos = end
+                read_size = CHUNK_SIZE
+                if pos > CHUNK_SIZE:
+                    text, pos = text[pos:], 0
+                continue
+        elif eof:
+            raise json.JSONDecodeError("Unterminated array", text, pos)
+
+        chunk = read_more(read_size)
+        if chunk is not None:
+            text, pos = text[pos:] + chunk, 0
+            # Grow reads for records spanning many chunks to avoid re-decoding them repeatedly
+            read_size *= 2
+        else:
+            eof = True
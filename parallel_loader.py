@@ -0,0 +1,149 @@
+import os
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, List, Set, Tuple
+
+from config_manager import ConfigManager
+from extraction_plan import SchemaPlan
+from import_stats import ImportStats
+from json_processor import SimpleJsonProcessor
+from zip_source import ZipJsonSource
+
+# Number of parser processes used when no worker count is given
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Maximum number of row batches waiting for the writer
+DEFAULT_QUEUE_SIZE = 16
+
+# Queue shared with the parser processes, set by _init_worker
+_batch_queue = None
+
+
+class RowBatchCollector(SimpleJsonProcessor):
+    """Processor that flattens records into row batches for a writer instead of touching the database."""
+
+    def __init__(self, batch_queue, batch_size: int):
+        super().__init__(None, batch_size)
+        self.batch_queue = batch_queue
+
+    def _create_table(self, table_name: str, fields: List[str], parent_id: str = None):
+        if table_name in self._table_columns:
+            return
+        self._table_columns[table_name] = set(fields) | ({parent_id} if parent_id else set())
+        self.batch_queue.put(("create", table_name, fields, parent_id))
+
+    def _known_columns(self, table_name: str) -> Set[str]:
+        # Columns already announced to the writer, the writer checks the actual table
+        return self._table_columns.setdefault(table_name, set())
+
+    def _add_column(self, table_name: str, field: str):
+        self.batch_queue.put(("alter", table_name, [field]))
+
+    def insert_rows(self, table_name: str, columns: Tuple[str, ...], rows: List[List[Any]]):
+        start = time.perf_counter()
+        self.batch_queue.put(("insert", table_name, columns, rows))
+        if self.stats is not None:
+            # Blocks while the writer is behind
+            self.stats.add("queue_wait", time.perf_counter() - start, len(rows), table_name)
+
+
+def _init_worker(batch_queue):
+    global _batch_queue
+    _batch_queue = batch_queue
+
+
+def _parse_file(zip_path: Path, json_filename: str, plans: Tuple[SchemaPlan, ...], batch_size: int):
+    """Parse and flatten a JSON file for all its schemas, sending row batches and stage timings to the writer."""
+    error = None
+    stats = ImportStats()
+    stats.current_file = json_filename
+    try:
+        collector = RowBatchCollector(_batch_queue, batch_size)
+        collector.stats = stats
+        with ZipJsonSource(zip_path) as source, source.open(json_filename) as f:
+            stats.process_stream(collector, plans, f)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    _batch_queue.put(("done", json_filename, error, stats.records))
+
+
+def _apply_batch(processor: SimpleJsonProcessor, batch: Tuple):
+    """Apply a batch produced by a parser process on the writer connection."""
+    kind = batch[0]
+    if kind == "create":
+        processor._create_table(*batch[1:])
+    elif kind == "alter":
+        processor._alter_table(*batch[1:])
+    elif kind == "insert":
+        processor.insert_rows(*batch[1:])
+
+
+def _discard_batches(batch_queue, stop: threading.Event):
+    """Keep reading batches so parser processes blocked on the full queue can finish and exit."""
+    while not stop.is_set():
+        try:
+            batch_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+
+def load_files_parallel(processor: SimpleJsonProcessor, zip_path: Path, json_files: List[str],
+                        config_manager: ConfigManager, workers: int = DEFAULT_WORKERS,
+                        queue_size: int = DEFAULT_QUEUE_SIZE):
+    """Parse files in a process pool while this thread is the only database writer."""
+    tasks = []
+    for json_filename in json_files:
+        plans = config_manager.get_plans(json_filename)
+        if plans is None:
+            print(f"Skipping {json_filename} - no configuration found")
+            continue
+        # Every file is an independent task, its schemas are served in a single pass
+        for plan in plans:
+            processor.register_indexes(plan)
+        tasks.append((json_filename, plans))
+
+    batch_queue = multiprocessing.Queue(maxsize=queue_size)
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(batch_queue,)) as pool:
+        futures = [pool.submit(_parse_file, zip_path, json_filename, plans, processor.batch_size)
+                   for json_filename, plans in tasks]
+        print(f"==== Processing {len(futures)} files with {workers} workers...")
+
+        try:
+            remaining = len(futures)
+            while remaining:
+                try:
+                    batch = batch_queue.get(timeout=1)
+                except queue.Empty:
+                    # A crashed worker never reports back, stop waiting for it
+                    failed = [f for f in futures if f.done() and f.exception() is not None]
+                    if failed:
+                        raise Exception(f"Parser process failed: {failed[0].exception()}")
+                    continue
+
+                if batch[0] == "done":
+                    remaining -= 1
+                    if batch[2]:
+                        errors.append(f"{batch[1]}: {batch[2]}")
+                    else:
+                        if processor.stats is not None:
+                            processor.stats.merge(batch[3])
+                        print(f"Completed processing: {batch[1]}")
+                elif not errors:
+                    _apply_batch(processor, batch)
+        except BaseException:
+            # Workers blocked on the full queue would keep the pool shutdown waiting forever
+            stop = threading.Event()
+            drain = threading.Thread(target=_discard_batches, args=(batch_queue, stop), daemon=True)
+            drain.start()
+            pool.shutdown(wait=True, cancel_futures=True)
+            stop.set()
+            drain.join()
+            raise
+
+    if errors:
+        raise Exception(f"Failed to process {errors[0]}")
@@ -0,0 +1,193 @@
+import sqlite3
+import time
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+
+class SummaryTable(NamedTuple):
+    """Denormalized result of a lineage join, materialized once the import has finished."""
+    name: str
+    # Tables the select reads, the summary is skipped when one is missing
+    sources: Tuple[str, ...]
+    select: str
+    # Columns compared with =, each gets its own index
+    indexes: Tuple[str, ...] = ()
+    # Column searched with LIKE '%text%', covered by a trigram index named <name>_fts
+    fulltext: str = ""
+
+
+class SummaryQuery(NamedTuple):
+    """Template of common_sql_templates_config2.sql served from a summary table."""
+    summary: str
+    # Condition on the summary columns, its parameter is the searched value
+    where: str
+    # The value is searched with LIKE '%value%' instead of compared
+    contains: bool = False
+
+
+SUMMARY_TABLES = (
+    SummaryTable(
+        name="_summary_action_button_measures",
+        sources=("action_button_measure_usages", "action_buttons", "measures", "action_buttons_ibpl_rules"),
+        select="""
+            SELECT
+                abmu.ModuleName,
+                measures.MeasureName,
+                abmu.IsInput,
+                abmu.IsOutput,
+                ab.Name AS ActionButtonName,
+                abir.ConfigJson_IBPLRules_template AS IBPLRules
+            FROM action_button_measure_usages abmu
+            JOIN action_buttons ab
+                ON abmu.ActionButtonId = ab.Id
+            JOIN measures
+                ON abmu.MeasureId = measures.Id
+            JOIN action_buttons_ibpl_rules abir
+                ON ab.Id = abir.Id
+        """,
+        fulltext="MeasureName",
+    ),
+    SummaryTable(
+        name="_summary_widget_lineage",
+        sources=("view_widget_definitions", "views", "pages", "page_groups", "workspaces"),
+        select="""
+            SELECT
+                vwd.ModuleName,
+                vwd.Name AS WidgetName,
+                views.Name AS ViewName,
+                p.Name AS PageName,
+                pg.Name AS PageGroupName,
+                ws.Name AS WorkspaceName
+            FROM view_widget_definitions vwd
+            JOIN views
+                ON vwd.ViewId = views.Id
+            JOIN pages p
+                ON views.PageId = p.Id
+            JOIN page_groups pg
+                ON p.PageGroupId = pg.Id
+            JOIN workspaces ws
+                ON ws.Id = views.WorkspaceId
+        """,
+        fulltext="WidgetName",
+    ),
+    # Only widgets with a view widget definition can match the title search, so that join is inner
+    SummaryTable(
+        name="_summary_widget_titles",
+        sources=("widget_definitions", "widget_model_axis", "ui_preferences", "view_widget_definitions"),
+        select="""
+            SELECT
+                wd.ModuleName,
+                wd.Name,
+                vwd.Title,
+                wma.ConfigJson_LevelAttributes_DimensionName || '.[' ||
+                wma.ConfigJson_LevelAttributes_AttributeName || ']' AS `Dimension.AttributeName`,
+                up.ConfigJson_ModelDefinition_LevelAttributes_DimensionName || '.[' ||
+                up.ConfigJson_ModelDefinition_LevelAttributes_AttributeName || ']' AS `UPDimensionName.UPAttributeName`,
+                wma.ConfigJson_RegularMeasures_Name AS MeasureName
+            FROM widget_definitions wd
+            LEFT JOIN widget_model_axis wma
+                ON wd.WidgetModelId = wma.Id
+            LEFT JOIN ui_preferences up
+                ON wma.ConfigJson_LevelAttributes_AttributeName = up.PreferenceName
+            JOIN view_widget_definitions vwd
+                ON vwd.Name = wd.Name
+            WHERE wma.ConfigJson_LevelAttributes_Axis <> 'none' OR wma.ConfigJson_RegularMeasures_Name IS NOT NULL
+            GROUP BY
+                wd.ModuleName,
+                wd.Name,
+                vwd.Title,
+                `Dimension.AttributeName`,
+                `UPDimensionName.UPAttributeName`,
+                MeasureName
+        """,
+        indexes=("Title", "Name"),
+    ),
+)
+
+# Named templates of common_sql_templates_config2.sql, by their comment line
+SUMMARY_QUERIES = {
+    "Search Measure Usage in ActionButton": SummaryQuery(
+        "_summary_action_button_measures", "MeasureName LIKE ?", contains=True),
+    "Search Widget Dependency": SummaryQuery("_summary_widget_lineage", "WidgetName LIKE ?", contains=True),
+    "Search Widget Definitions by Title": SummaryQuery("_summary_widget_titles", "Title = ? OR Name = ''"),
+}
+
+
+def _table_exists(conn: sqlite3.Connection, table_name: str) -> bool:
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    return cursor.fetchone() is not None
+
+
+def drop_summary_tables(conn: sqlite3.Connection):
+    """Drop the summary tables of an earlier import, they are stale once their sources change."""
+    for summary in SUMMARY_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {summary.name}_fts")
+        conn.execute(f"DROP TABLE IF EXISTS {summary.name}")
+    conn.commit()
+
+
+def build_summary_tables(conn: sqlite3.Connection, verbose: bool = True) -> Dict[str, float]:
+    """Materialize the summary tables whose source tables exist and return the build time of each.
+
+    Run after the import has finished, so ModuleName is resolved and the joins use the source indexes.
+    """
+    timings = {}
+    for summary in SUMMARY_TABLES:
+        missing = [table_name for table_name in summary.sources if not _table_exists(conn, table_name)]
+        if missing:
+            if verbose:
+                print(f"  == Skipped summary table {summary.name}, missing tables: {', '.join(missing)}")
+            continue
+
+        start = time.perf_counter()
+        conn.execute(f"DROP TABLE IF EXISTS {summary.name}_fts")
+        conn.execute(f"DROP TABLE IF EXISTS {summary.name}")
+        try:
+            conn.execute(f"CREATE TABLE {summary.name} AS {summary.select}")
+        except sqlite3.OperationalError as e:
+            # A source table without one of the joined columns
+            if verbose:
+                print(f"  == Skipped summary table {summary.name}: {e}")
+            continue
+        for column in summary.indexes:
+            conn.execute(f"CREATE INDEX ix_{summary.name}_{column} ON {summary.name} ({column})")
+        if summary.fulltext:
+            try:
+                conn.execute(f"""
+                    CREATE VIRTUAL TABLE {summary.name}_fts USING fts5(
+                        {summary.fulltext}, content='{summary.name}', tokenize='trigram')
+                """)
+                conn.execute(f"INSERT INTO {summary.name}_fts ({summary.name}_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError as e:
+                # FTS5 or its trigram tokenizer is not compiled into this SQLite build
+                print(f"    == Skipped full-text index {summary.name}_fts: {e}")
+        conn.execute(f"ANALYZE {summary.name}")
+        timings[summary.name] = time.perf_counter() - start
+        if verbose:
+            count = conn.execute(f"SELECT COUNT(*) FROM {summary.name}").fetchone()[0]
+            print(f"  == Created summary table {summary.name} with {count} rows in {timings[summary.name]:.3f}s")
+    conn.commit()
+    return timings
+
+
+def run_summary_query(conn: sqlite3.Connection, template: str, value: str) -> List[Tuple[Any, ...]]:
+    """Run a named template of common_sql_templates_config2.sql for a searched value.
+
+    Served from the summary table when the import built it, otherwise the summary's joins are run.
+    Contains searches of at least 3 characters use the summary's trigram index when it exists.
+    """
+    if template not in SUMMARY_QUERIES:
+        raise ValueError(f"Unknown template: {template}, expected one of {', '.join(SUMMARY_QUERIES)}")
+    query = SUMMARY_QUERIES[template]
+    summary = next(summary for summary in SUMMARY_TABLES if summary.name == query.summary)
+    parameter = f"%{value}%" if query.contains else value
+
+    if not _table_exists(conn, summary.name):
+        # The same condition on the summary's select, SQLite pushes it down into the joins
+        return conn.execute(f"SELECT * FROM ({summary.select}) WHERE {query.where}", (parameter,)).fetchall()
+    if query.contains and len(value) >= 3 and _table_exists(conn, f"{summary.name}_fts"):
+        sql = f"""
+            SELECT * FROM {summary.name}
+            WHERE rowid IN (SELECT rowid FROM {summary.name}_fts WHERE {summary.fulltext} LIKE ?)
+        """
+        return conn.execute(sql, (parameter,)).fetchall()
+    return conn.execute(f"SELECT * FROM {summary.name} WHERE {query.where}", (parameter,)).fetchall()
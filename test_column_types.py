@@ -0,0 +1,64 @@
+import io
+import json
+import sqlite3
+
+from column_types import ColumnType, load_entities, plan_column_types
+from conftest import MODULES, workspace_records
+from extraction_plan import compile_config
+from json_processor import SimpleJsonProcessor
+from main import import_tenant
+
+SCHEMA = {"Entities": [{"Name": "Measure", "Properties": [
+    {"Name": "Id", "Type": "System.String"},
+    {"Name": "Count", "Type": "System.Int32", "IsNullable": True},
+    {"Name": "Weight", "Type": "System.Double"},
+    {"Name": "Label", "Type": "System.String", "IsNullable": True},
+]}]}
+
+CONFIG = {"table": "measures", "fields": ["Id", "Count", "Weight", "Label", "Other"]}
+
+
+def measure_types():
+    entities = load_entities(io.BytesIO(json.dumps(SCHEMA).encode()))
+    return plan_column_types({"measures.json": compile_config(CONFIG)}, entities)
+
+
+def declared_types(conn, table_name):
+    return {name: column_type for _, name, column_type, *_ in conn.execute(f"PRAGMA table_info({table_name})")}
+
+
+def test_declared_types_become_column_affinities():
+    types = measure_types()
+    assert types == {"measures": {"Id": ColumnType("TEXT", False), "Count": ColumnType("INTEGER", True),
+                                  "Weight": ColumnType("REAL", False), "Label": ColumnType("TEXT", False)}}
+
+    processor = SimpleJsonProcessor(sqlite3.connect(":memory:"), verbose=False, column_types=types)
+    processor.process_data(CONFIG, [{"Id": "1"}])
+    # Undeclared columns stay TEXT
+    assert declared_types(processor.conn, "measures") == {
+        "Id": "TEXT", "Count": "INTEGER", "Weight": "REAL", "Label": "TEXT", "Other": "TEXT"}
+
+
+def test_missing_values_are_null_only_for_nullable_non_string_columns():
+    processor = SimpleJsonProcessor(sqlite3.connect(":memory:"), verbose=False, column_types=measure_types())
+    processor.process_data(CONFIG, [{"Id": "1"}, {"Id": "2", "Count": 3, "Weight": 1.5, "Label": "x", "Other": "y"}])
+
+    assert processor.conn.execute("SELECT * FROM measures ORDER BY Id").fetchall() == [
+        ("1", None, "", "", ""), ("2", 3, 1.5, "x", "y")]
+
+
+def test_columns_are_untyped_without_schema_file(make_zip, config_manager, tmp_path):
+    files = {"modules.json": MODULES, "workspaces.json": workspace_records(2)}
+    import_tenant(make_zip(files), tmp_path / "untyped.db", config_manager, workers=1, quiet=True)
+
+    files["_schema.json"] = {"Entities": [{"Name": "Workspace", "Properties": [
+        {"Name": "Title", "Type": "System.Int32", "IsNullable": True}]}]}
+    import_tenant(make_zip(files, "typed.zip"), tmp_path / "typed.db", config_manager, workers=1, quiet=True)
+
+    untyped, typed = sqlite3.connect(tmp_path / "untyped.db"), sqlite3.connect(tmp_path / "typed.db")
+    try:
+        assert set(declared_types(untyped, "workspaces").values()) == {"TEXT"}
+        assert declared_types(typed, "workspaces")["Title"] == "INTEGER"
+    finally:
+        untyped.close()
+        typed.close()
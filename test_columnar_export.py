@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from column_types import ColumnType
+from json_processor import SimpleJsonProcessor
+from main import export_tenant, import_tenant
+
+pyarrow = pytest.importorskip("pyarrow")
+pytest.importorskip("pyarrow.parquet")
+
+from columnar_export import ColumnarSink  # noqa: E402
+
+def read_rows(path):
+    return pyarrow.parquet.read_table(path).to_pylist()
+
+
+def test_export_matches_sqlite_import(tenant_zip, config_manager, tmp_path):
+    zip_path = tenant_zip(30)
+    import_tenant(zip_path, tmp_path / "import.db", config_manager, workers=1, quiet=True)
+    files, tables = export_tenant(zip_path, tmp_path / "tenant", config_manager, "parquet", workers=1, quiet=True)
+    assert (files, tables) == (2, len(list((tmp_path / "tenant").iterdir())))
+
+    conn = sqlite3.connect(tmp_path / "import.db")
+    try:
+        for table_name in ("modules", "workspaces", "page_groups"):
+            exported = read_rows(tmp_path / "tenant" / f"{table_name}.parquet")
+            columns = list(exported[0])
+            imported = conn.execute(f"SELECT {', '.join(columns)} FROM {table_name}").fetchall()
+            assert sorted(tuple(row.values()) for row in exported) == sorted(imported)
+    finally:
+        conn.close()
+
+
+def test_batches_are_written_as_they_arrive(tmp_path):
+    processor = SimpleJsonProcessor(None, verbose=False, sink=ColumnarSink(tmp_path, "parquet", verbose=False))
+    processor._create_table("t", ["Id"])
+    processor.insert_rows("t", ("Id",), [["a"], ["b"]])
+    assert (tmp_path / "t.parquet").exists()
+
+    # A column added after the file was opened widens the written rows
+    processor._add_column("t", "Late")
+    processor.insert_rows("t", ("Id", "Late"), [["c", "x"]])
+    processor.finish_load()
+    assert read_rows(tmp_path / "t.parquet") == [
+        {"Id": "a", "Late": None}, {"Id": "b", "Late": None}, {"Id": "c", "Late": "x"}]
+
+
+def test_non_numeric_values_are_kept_as_text(tmp_path, capsys):
+    processor = SimpleJsonProcessor(None, verbose=False, column_types={"t": {"Count": ColumnType("INTEGER", True)}},
+                                    sink=ColumnarSink(tmp_path, "parquet", verbose=False))
+    processor._create_table("t", ["Id", "Count"])
+    processor.insert_rows("t", ("Id", "Count"), [["a", 1], ["b", "2"]])
+    processor.insert_rows("t", ("Id", "Count"), [["c", "many"], ["d", 1.5]])
+    processor.finish_load()
+
+    assert read_rows(tmp_path / "t.parquet") == [
+        {"Id": "a", "Count": "1"}, {"Id": "b", "Count": "2"}, {"Id": "c", "Count": "many"}, {"Id": "d", "Count": "1.5"}]
+    assert "Column Count of table t has a non-numeric value" in capsys.readouterr().out
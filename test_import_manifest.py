@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from conftest import MODULES, workspace_records
+from import_manifest import ImportManifest
+from json_processor import LOAD_PROFILES, SqliteSink
+from main import batch_main, import_tenant
+
+
+def table_rows(db_path, table_name):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT * FROM {table_name} ORDER BY Id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_changed_and_removed_files():
+    manifest = ImportManifest(sqlite3.connect(":memory:"))
+    manifest.save("a.json", ("1", 10, "s"), ["a"])
+    manifest.save("b.json", ("2", 20, "s"), ["b"])
+
+    signatures = {"a.json": ("1", 10, "s"), "b.json": ("2", 20, "t"), "c.json": ("3", 30, "s")}
+    assert manifest.changed_files(signatures) == {"b.json", "c.json"}
+    assert manifest.removed_files(["b.json", "c.json"]) == {"a.json"}
+
+
+def test_manifest_survives_reload():
+    conn = sqlite3.connect(":memory:")
+    ImportManifest(conn).save("a.json", ("1", 10, "s"), ["a", "a_children"])
+
+    manifest = ImportManifest(conn)
+    assert manifest.load()
+    assert manifest.signatures == {"a.json": ("1", 10, "s")}
+    assert manifest.tables == {"a.json": {"a", "a_children"}}
+
+
+def test_incremental_reimports_changed_files_only(tenant_zip, config_manager, tmp_path):
+    db_path = tmp_path / "tenant.db"
+    import_tenant(tenant_zip(3), db_path, config_manager, workers=1, incremental=True, quiet=True)
+
+    zip_path = tenant_zip(5, "tenant2.zip")
+    import_tenant(zip_path, db_path, config_manager, workers=1, incremental=True, quiet=True)
+
+    rows = table_rows(db_path, "workspaces")
+    assert len(rows) == 5
+    assert rows[0][0] == "Planning"
+
+
+def test_incremental_without_manifest_rebuilds(tenant_zip, config_manager, tmp_path):
+    db_path = tmp_path / "tenant.db"
+    zip_path = tenant_zip()
+    import_tenant(zip_path, db_path, config_manager, workers=1, quiet=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE _import_manifest")
+    conn.commit()
+    conn.close()
+
+    # The old tables already hold ModuleName instead of ModuleId
+    import_tenant(zip_path, db_path, config_manager, workers=1, incremental=True, quiet=True)
+    assert len(table_rows(db_path, "workspaces")) == 3
+
+
+def test_changed_schema_reimports_every_file(make_zip, config_manager, tmp_path, capsys):
+    db_path = tmp_path / "tenant.db"
+    files = {"modules.json": MODULES, "workspaces.json": workspace_records(3), "_schema.json": {"Entities": []}}
+    import_tenant(make_zip(files), db_path, config_manager, workers=1, incremental=True, quiet=True)
+
+    # Same files, but Title is now declared as an integer
+    files["_schema.json"] = {"Entities": [{"Name": "Workspace", "Properties": [{"Name": "Title", "Type": "System.Int32"}]}]}
+    capsys.readouterr()
+    import_tenant(make_zip(files, "tenant2.zip"), db_path, config_manager, workers=1, incremental=True, quiet=True)
+    assert "2 of 2 files changed" in capsys.readouterr().out
+
+
+def test_incremental_runs_keep_the_safe_profile(tenant_zip, config_manager, tmp_path, monkeypatch):
+    applied = []
+    apply_pragmas = SqliteSink.apply_pragmas
+    monkeypatch.setattr(SqliteSink, "apply_pragmas",
+                        lambda self, pragmas: applied.append(dict(pragmas)) or apply_pragmas(self, pragmas))
+    zip_path = tenant_zip()
+
+    import_tenant(zip_path, tmp_path / "full.db", config_manager, workers=1, quiet=True)
+    assert LOAD_PROFILES["bulk"] in applied
+
+    applied.clear()
+    import_tenant(zip_path, tmp_path / "tenant.db", config_manager, workers=1, incremental=True, quiet=True)
+    assert applied == [LOAD_PROFILES["safe"]]
+
+
+def test_incremental_bulk_is_rejected_on_the_command_line(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        batch_main(["tenant.zip", "-o", str(tmp_path), "--incremental", "--profile", "bulk"])
+    assert exit_info.value.code == 2
@@ -0,0 +1,33 @@
+import json
+import sqlite3
+
+from import_stats import STATS_TABLE
+from main import batch_main, import_tenant
+
+
+def test_stats_are_saved_per_stage_and_table(tenant_zip, config_manager, tmp_path):
+    import_tenant(tenant_zip(3), tmp_path / "tenant.db", config_manager, workers=1, quiet=True,
+                  stats_path=tmp_path / "stats.json")
+
+    conn = sqlite3.connect(tmp_path / "tenant.db")
+    try:
+        rows = conn.execute(f"SELECT FileName, TableName, Stage, Count FROM {STATS_TABLE}").fetchall()
+    finally:
+        conn.close()
+    counts = {(file_name, table_name, stage): count for file_name, table_name, stage, count in rows}
+    # Child table rows are counted under the file that produced them
+    assert counts[("workspaces.json", "workspaces", "insert")] == 3
+    assert counts[("workspaces.json", "page_groups", "insert")] == 3
+    assert counts[("workspaces.json", "workspaces", "parse")] == 3
+    assert counts[("modules.json", "modules", "insert")] == 1
+    assert {("", "", "finish_load"), ("", "", "transform_module_id"), ("", "", "total")} <= set(counts)
+
+    stats = json.loads((tmp_path / "stats.json").read_text(encoding="utf-8"))
+    assert {(stage["file"], stage["table"], stage["stage"]): stage["count"] for stage in stats["stages"]} == counts
+    assert {"insert", "parse", "flatten", "total"} <= set(stats["totals"])
+
+
+def test_batch_stats_are_written_next_to_the_database(tenant_zip, tmp_path):
+    assert batch_main([str(tenant_zip(2)), "-o", str(tmp_path / "out"), "-j", "1", "-q", "--stats"]) == 0
+    stats = json.loads((tmp_path / "out" / "tenant.stats.json").read_text(encoding="utf-8"))
+    assert stats["totals"]["total"] > 0
@@ -0,0 +1,165 @@
+import sqlite3
+
+from json_processor import SimpleJsonProcessor, SqliteSink, TableSink
+
+ACTION_BUTTON = {"ModuleId": "m1", "Id": "ab1", "Name": "Approve", "ConfigJson": {"FieldBindings": [
+    {"fieldName": "Qty", "validation": [{"maxLength": 5, "required": True}, {"maxLength": 9}]},
+    {"fieldName": "Note", "validation": {"required": False}},
+    {"fieldName": "Plain"},
+]}}
+
+
+def memory_processor(**kwargs):
+    return SimpleJsonProcessor(sqlite3.connect(":memory:"), verbose=False, **kwargs)
+
+
+def test_finish_load_restores_safe_settings_after_indexes(tmp_path):
+    events = []
+
+    class RecordingSink(SqliteSink):
+        def apply_pragmas(self, pragmas):
+            events.append(("pragmas", pragmas.get("synchronous")))
+            super().apply_pragmas(pragmas)
+
+    class RecordingProcessor(SimpleJsonProcessor):
+        def build_indexes(self):
+            events.append(("indexes", None))
+            return super().build_indexes()
+
+    conn = sqlite3.connect(tmp_path / "tenant.db")
+    processor = RecordingProcessor(conn, verbose=False, sink=RecordingSink(conn, "bulk"))
+    processor.finish_load()
+
+    # Indexes are built under the bulk settings, which are restored afterwards
+    assert events == [("pragmas", "OFF"), ("indexes", None), ("pragmas", "FULL")]
+    assert processor.conn.execute("PRAGMA synchronous").fetchone() == (2,)
+
+
+class RecordingSink(TableSink):
+    def __init__(self):
+        self.tables = {}
+        self.rows = []
+
+    def table_names(self):
+        return list(self.tables)
+
+    def create_table(self, table_name, columns, types):
+        self.tables[table_name] = columns
+
+    def insert_rows(self, table_name, columns, rows):
+        self.rows.append((table_name, columns, rows))
+
+
+def test_sink_receives_resolved_columns():
+    config = {"table": "t", "fields": ["ModuleId", "Id"], "children": {
+        "Items": {"table": "t_items", "fields": ["Value"], "parent_id": "ParentId"}}}
+    sink = RecordingSink()
+    processor = SimpleJsonProcessor(None, verbose=False, sink=sink)
+    processor.module_names = {"m1": "Planning"}
+    processor.process_data(config, [{"ModuleId": "m1", "Id": "1", "Items": [{"Value": "v", "ParentId": "1"}]}])
+
+    # ModuleName and parent_id columns are decided by the processor, the sink only stores them
+    assert sink.tables == {"t": ["ModuleName", "Id"], "t_items": ["Value", "ParentId"]}
+    assert ("t", ("ModuleName", "Id"), [["Planning", "1"]]) in sink.rows
+
+
+def test_field_bindings_keep_every_validation(config_manager):
+    processor = memory_processor()
+    processor.process_data(config_manager.get_plans("action_buttons.json"), [ACTION_BUTTON])
+
+    rows = processor.conn.execute("""
+        SELECT ConfigJson_FieldBindings_fieldName, ConfigJson_FieldBindings_validation_maxLength,
+               ConfigJson_FieldBindings_validation_required
+        FROM action_buttons_fieldbindings ORDER BY rowid
+    """).fetchall()
+    # Missing fields of a present validation are empty, bindings without one get NULL
+    assert rows == [("Qty", "5", "1"), ("Qty", "9", ""), ("Note", "", "0"), ("Plain", None, None)]
+
+
+def test_capped_explode_is_quiet_without_verbose(capsys):
+    config = {"table": "t", "fields": ["Id"], "children": {"Items": {
+        "table": "t", "fields": ["Name"], "explode": "items", "explode_limit": 2,
+        "children": {"Parts": {"table": "t", "fields": ["Part"]}}}}}
+    processor = memory_processor()
+    processor.process_data(config, [{"Id": "1", "Items": [{"Name": "a", "Parts": [{"Part": p} for p in "xyz"]}]}])
+
+    assert processor.conn.execute("SELECT COUNT(*) FROM t").fetchone() == (2,)
+    assert "Capped" not in capsys.readouterr().out
+
+
+def test_quiet_index_build_prints_nothing(capsys):
+    processor = memory_processor()
+    processor.process_data({"table": "t", "fields": ["Id", "ParentId"], "indexes": ["ParentId", "MissingId"]},
+                           [{"Id": "1", "ParentId": "0"}])
+    capsys.readouterr()
+
+    assert list(processor.build_indexes()) == ["ix_t_ParentId"]
+    assert capsys.readouterr().out == ""
+
+
+def table_rows(processor, table_name):
+    return processor.conn.execute(f"SELECT * FROM {table_name} ORDER BY rowid").fetchall()
+
+
+def test_batch_size_does_not_change_the_rows():
+    config = {"table": "t", "fields": ["Id", "Name"], "children": {
+        "Items": {"table": "t_items", "fields": ["Id", "Value"], "parent_id": "ParentId"}}}
+    records = [{"Id": str(index), "Name": f"n{index}", "Items": [{"Id": f"{index}.{item}", "Value": item}
+                                                                  for item in range(index % 4)]}
+               for index in range(50)]
+
+    single, batched = memory_processor(batch_size=1), memory_processor(batch_size=1000)
+    single.process_data(config, records)
+    batched.process_data(config, records)
+
+    for table_name in ("t", "t_items"):
+        assert table_rows(batched, table_name) == table_rows(single, table_name)
+    assert len(table_rows(batched, "t_items")) == sum(index % 4 for index in range(50))
+
+
+def test_records_are_routed_to_matching_schemas():
+    configs = [
+        {"table": "regular", "fields": ["Id"], "filters": {"Type": ["Regular", "Block"]}},
+        {"table": "procedure", "fields": ["Id"], "filters": {"Type": "Procedure", "Enabled": True}},
+        {"table": "every", "fields": ["Id"]},
+    ]
+    records = [{"Id": "1", "Type": "Regular"}, {"Id": "2", "Type": "Block"}, {"Id": "3", "Type": "Procedure",
+               "Enabled": True}, {"Id": "4", "Type": "Procedure", "Enabled": False}, {"Id": "5", "Type": ["x"]}]
+    processor = memory_processor()
+    processor.process_data(configs, records)
+
+    assert table_rows(processor, "regular") == [("1",), ("2",)]
+    assert table_rows(processor, "procedure") == [("3",)]
+    # Unhashable values only reach schemas without a filter on the field
+    assert table_rows(processor, "every") == [("1",), ("2",), ("3",), ("4",), ("5",)]
+
+
+EXPLODE_RECORD = {"Id": "r1", "Rules": [{"Name": "rule", "Inputs": [{"In": "a"}, {"In": "b"}],
+                                          "Outputs": [{"Out": "x"}, {"Out": "y"}]}]}
+
+
+def explode_rows(explode, limit=1000):
+    config = {"table": "rules", "fields": ["Id"], "children": {"Rules": {
+        "table": "rules", "fields": ["Name"], "explode": explode, "explode_limit": limit, "children": {
+            "Inputs": {"table": "rules", "fields": ["In"]},
+            "Outputs": {"table": "rules", "fields": ["Out"]}}}}}
+    processor = memory_processor()
+    processor.process_data(config, [EXPLODE_RECORD])
+    return processor.conn.execute(
+        "SELECT Id, Rules_Name, Rules_Inputs_In, Rules_Outputs_Out FROM rules WHERE Rules_Name IS NOT NULL "
+        "ORDER BY rowid").fetchall()
+
+
+def test_explode_first_keeps_the_first_nested_items():
+    assert explode_rows("first") == [("r1", "rule", "a", "x")]
+
+
+def test_explode_items_writes_a_row_per_nested_item():
+    assert explode_rows("items") == [("r1", "rule", "a", None), ("r1", "rule", "b", None),
+                                     ("r1", "rule", None, "x"), ("r1", "rule", None, "y")]
+
+
+def test_explode_cartesian_writes_every_combination():
+    assert explode_rows("cartesian") == [("r1", "rule", "a", "x"), ("r1", "rule", "a", "y"),
+                                         ("r1", "rule", "b", "x"), ("r1", "rule", "b", "y")]
+    assert len(explode_rows("cartesian", limit=3)) == 3
@@ -0,0 +1,44 @@
+import io
+import json
+
+import pytest
+
+from json_stream import iter_json_items
+
+RECORDS = [{"Id": 1234567, "Name": "Prévision € 😀", "Items": [1.5, -2e3, None, True]}, 98765, "text", [], {}]
+
+
+class ShortReader(io.BytesIO):
+    """Stream returning at most size bytes per read, like a socket or a slow decompressor."""
+
+    def __init__(self, data: bytes, size: int):
+        super().__init__(data)
+        self.size = size
+
+    def read(self, size=-1):
+        return super().read(self.size if size is None or size < 0 else min(size, self.size))
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64 * 1024])
+def test_fallback_matches_json_loads(size):
+    data = json.dumps(RECORDS, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_items(ShortReader(data, size), use_ijson=False)) == RECORDS
+
+
+def test_number_split_across_reads_is_one_item():
+    assert list(iter_json_items(ShortReader(b"[12345, 67890]", 3), use_ijson=False)) == [12345, 67890]
+
+
+def test_multi_byte_character_split_across_reads():
+    # Each read holds part of a character, which decodes to no text at all
+    data = '["😀😀"]'.encode("utf-8")
+    assert list(iter_json_items(ShortReader(data, 1), use_ijson=False)) == ["😀😀"]
+
+
+def test_single_record_file_is_one_item():
+    assert list(iter_json_items(ShortReader(b' {"Id": 1} ', 2), use_ijson=False)) == [{"Id": 1}]
+
+
+def test_truncated_array_is_an_error():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_items(ShortReader(b'[{"Id": 1}, {"Id"', 4), use_ijson=False))
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from conftest import MODULES
+from json_processor import SimpleJsonProcessor
+from main import batch_main, import_tenant
+
+
+def test_table_count_leaves_out_internal_tables(tenant_zip, config_manager, tmp_path):
+    num_files, num_tables = import_tenant(tenant_zip(2), tmp_path / "tenant.db", config_manager,
+                                          workers=1, quiet=True)
+
+    conn = sqlite3.connect(tmp_path / "tenant.db")
+    names = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    conn.close()
+    assert "_import_stats" in names and "_import_manifest" in names
+    assert num_files == 2
+    assert num_tables == len([name for name in names if not name.startswith(("_", "sqlite_"))])
+
+
+def test_two_pass_reaches_the_import_from_the_command_line(tenant_zip, tmp_path, monkeypatch):
+    prepared = []
+    prepare_tables = SimpleJsonProcessor.prepare_tables
+    monkeypatch.setattr(SimpleJsonProcessor, "prepare_tables",
+                        lambda self, config, json_data: prepared.append(1) or prepare_tables(self, config, json_data))
+    zip_path = tenant_zip(2)
+
+    assert batch_main([str(zip_path), "-o", str(tmp_path / "out"), "-j", "1", "-q"]) == 0
+    assert prepared == []
+    assert batch_main([str(zip_path), "-o", str(tmp_path / "out"), "-j", "1", "-q", "--two-pass"]) == 0
+    assert len(prepared) == 2
+
+
+def test_batch_expands_globs_and_names_databases_after_the_zips(tenant_zip, tmp_path, capsys):
+    first = tenant_zip(2, "first.zip")
+    tenant_zip(2, "second.zip")
+
+    # The explicit path also matched by the pattern is imported once
+    assert batch_main([str(tmp_path / "*.zip"), str(first), "-o", str(tmp_path / "out"), "-j", "1", "-q"]) == 0
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == ["first.db", "second.db"]
+    assert "2 of 2 tenants imported" in capsys.readouterr().out
+
+
+def test_batch_exit_code_reports_a_failed_tenant(make_zip, tmp_path, capsys):
+    zip_path = make_zip({"modules.json": MODULES})
+    broken = tmp_path / "broken.zip"
+    broken.write_bytes(b"not a zip file")
+
+    assert batch_main([str(zip_path), str(broken), "-o", str(tmp_path / "out"), "-j", "1", "-q"]) == 1
+    assert (tmp_path / "out" / "tenant.db").exists()
+    output = capsys.readouterr().out
+    assert "broken.zip" in output and "FAILED" in output
+    assert "1 of 2 tenants imported" in output
+
+
+def test_incremental_is_rejected_for_other_formats(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        batch_main(["tenant.zip", "-o", str(tmp_path), "--incremental", "--format", "parquet"])
+    assert exit_info.value.code == 2
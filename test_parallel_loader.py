@@ -0,0 +1,74 @@
+import faulthandler
+import sqlite3
+
+import pytest
+
+from conftest import workspace_records
+from json_processor import SimpleJsonProcessor
+from json_stream import iter_json_items
+from main import load_json_files
+from parallel_loader import load_files_parallel
+from zip_source import ZipJsonSource
+
+
+class FailingProcessor(SimpleJsonProcessor):
+    def insert_rows(self, table_name, columns, rows):
+        raise RuntimeError("disk full")
+
+
+@pytest.fixture
+def hang_guard():
+    # A hanging pool shutdown fails the run instead of blocking it
+    faulthandler.dump_traceback_later(120, exit=True)
+    yield
+    faulthandler.cancel_dump_traceback_later()
+
+
+def test_parallel_load_matches_sequential(make_zip, config_manager):
+    zip_path = make_zip({"workspaces.json": workspace_records(200)})
+
+    sequential = SimpleJsonProcessor(sqlite3.connect(":memory:"), batch_size=7, verbose=False)
+    with ZipJsonSource(zip_path) as source, source.open("workspaces.json") as f:
+        sequential.process_data(config_manager.get_plans("workspaces.json"), iter_json_items(f))
+
+    parallel = SimpleJsonProcessor(sqlite3.connect(":memory:"), batch_size=7, verbose=False)
+    load_files_parallel(parallel, zip_path, ["workspaces.json"], config_manager, workers=2)
+    parallel.flush()
+
+    for table_name in ("workspaces", "page_groups"):
+        query = f"SELECT * FROM {table_name} ORDER BY Id"
+        assert parallel.conn.execute(query).fetchall() == sequential.conn.execute(query).fetchall()
+    assert len(parallel.conn.execute("SELECT * FROM page_groups").fetchall()) == 200
+
+
+def test_writer_error_is_raised_instead_of_hanging(make_zip, config_manager, hang_guard):
+    zip_path = make_zip({"workspaces.json": workspace_records(500), "modules.json": [{"ModuleId": "m1"}] * 500})
+    processor = FailingProcessor(sqlite3.connect(":memory:"), batch_size=1, verbose=False)
+
+    # Batches of one row fill the queue of two long before the parsers are done
+    with pytest.raises(RuntimeError, match="disk full"):
+        load_files_parallel(processor, zip_path, ["workspaces.json", "modules.json"],
+                            config_manager, workers=2, queue_size=2)
+
+
+def test_two_pass_prepares_tables_before_parallel_parsing(tenant_zip, config_manager):
+    zip_path = tenant_zip(20)
+    events = []
+
+    class RecordingProcessor(SimpleJsonProcessor):
+        def prepare_tables(self, config, json_data):
+            events.append("prepare")
+            super().prepare_tables(config, json_data)
+
+        def insert_rows(self, table_name, columns, rows):
+            events.append("insert")
+            super().insert_rows(table_name, columns, rows)
+
+    processor = RecordingProcessor(sqlite3.connect(":memory:"), verbose=False)
+    with ZipJsonSource(zip_path) as source:
+        load_json_files(processor, source, zip_path, config_manager,
+                        ["modules.json", "workspaces.json"], workers=2, two_pass=True)
+
+    # Modules are loaded first, then workspaces.json is prepared before its rows arrive
+    assert events[:3] == ["prepare", "insert", "prepare"]
+    assert processor.conn.execute("SELECT COUNT(*) FROM page_groups").fetchone() == (20,)
@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from main import export_tenant, import_tenant
+from server_db_export import ServerDbSink, sqlite_connector
+
+
+def rows(db_path, table_name):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute(f"SELECT * FROM {table_name}").fetchall())
+    finally:
+        conn.close()
+
+
+def test_sqlite_stand_in_matches_sqlite_import(tenant_zip, config_manager, tmp_path):
+    zip_path = tenant_zip(50)
+    import_tenant(zip_path, tmp_path / "import.db", config_manager, workers=1, quiet=True)
+    export_tenant(zip_path, tmp_path / "tenant", config_manager, "mysql", workers=1, quiet=True,
+                  db_url=f"sqlite:///{tmp_path / 'server'}")
+
+    for table_name in ("modules", "workspaces", "page_groups"):
+        assert rows(tmp_path / "server" / "tenant.db", table_name) == rows(tmp_path / "import.db", table_name)
+
+
+def test_in_flight_batches_are_bounded_by_the_pool(tmp_path):
+    finished = []
+
+    class SlowSink(ServerDbSink):
+        def _write_rows(self, table_name, columns, batch):
+            time.sleep(0.01)
+            finished.append(1)
+
+    sink = SlowSink(sqlite_connector(tmp_path / "server.db"), "sqlite", pool_size=2)
+    outstanding = []
+    try:
+        for index in range(20):
+            sink.insert_rows("t", ("Id",), [[index]])
+            outstanding.append(index + 1 - len(finished))
+        sink._wait()
+    finally:
+        sink.close()
+    assert len(finished) == 20
+    # A slow server makes the loader wait instead of queueing every batch
+    assert max(outstanding) <= 2
@@ -0,0 +1,81 @@
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from summary_tables import SUMMARY_QUERIES, build_summary_tables, run_summary_query
+
+TEMPLATES_FILE = Path(__file__).parent / "common_sql_templates_config2.sql"
+
+# Tables and columns read by the summarized templates
+TABLES = {
+    "action_button_measure_usages": ["ModuleName", "ActionButtonId", "MeasureId", "IsInput", "IsOutput"],
+    "action_buttons": ["Id", "Name"],
+    "measures": ["Id", "MeasureName"],
+    "action_buttons_ibpl_rules": ["Id", "ConfigJson_IBPLRules_template"],
+    "view_widget_definitions": ["ModuleName", "Name", "ViewId", "Title"],
+    "views": ["Id", "Name", "PageId", "WorkspaceId"],
+    "pages": ["Id", "Name", "PageGroupId"],
+    "page_groups": ["Id", "Name"],
+    "workspaces": ["Id", "Name"],
+    "widget_definitions": ["ModuleName", "Name", "WidgetModelId"],
+    "widget_model_axis": ["Id", "ConfigJson_LevelAttributes_DimensionName", "ConfigJson_LevelAttributes_AttributeName",
+                          "ConfigJson_LevelAttributes_Axis", "ConfigJson_RegularMeasures_Name"],
+    "ui_preferences": ["PreferenceName", "ConfigJson_ModelDefinition_LevelAttributes_DimensionName",
+                       "ConfigJson_ModelDefinition_LevelAttributes_AttributeName"],
+}
+
+NAMES = [None, "", "Alpha Plan", "Beta", "CML Iteration Slice Level", "Procurement Plan - COC", "x"]
+
+# Template title, searched literal of the template and the values searched instead
+SEARCHES = [
+    ("Search Measure Usage in ActionButton", "'%CML Iteration Slice Level%'", ["CML", "Iteration Slice", "Be", "Zzz"]),
+    ("Search Widget Dependency", "'%Procurement Plan - COC Summary by Item%'", ["Procurement", "Alpha", "x", "Pl"]),
+    ("Search Widget Definitions by Title", "'Currency Exchange Monthly'", ["Beta", "Alpha Plan", "", "nothing"]),
+]
+
+
+def template_sql(title: str, literal: str) -> str:
+    """The template of common_sql_templates_config2.sql with its searched literal as a parameter."""
+    text = TEMPLATES_FILE.read_text(encoding="utf-8")
+    marker = f"-- {title}\n" if f"-- {title}\n" in text else f"--{title}\n"
+    return text.split(marker)[1].split(";")[0].replace(literal, "?")
+
+
+@pytest.fixture
+def conn():
+    """Small tenant database with random names and join keys, including NULLs and misses."""
+    rng = random.Random(1)
+    conn = sqlite3.connect(":memory:")
+    for table_name, columns in TABLES.items():
+        conn.execute(f"CREATE TABLE {table_name} ({', '.join(f'{column} TEXT' for column in columns)})")
+        for _ in range(30):
+            row = [rng.choice([None, "1", "2", "3", "4"]) if column.endswith("Id") else
+                   rng.choice([None, "none", "row"]) if column.endswith("Axis") else rng.choice(NAMES)
+                   for column in columns]
+            conn.execute(f"INSERT INTO {table_name} VALUES ({', '.join('?' * len(columns))})", row)
+    return conn
+
+
+def assert_same_as_templates(conn):
+    for title, literal, values in SEARCHES:
+        sql = template_sql(title, literal)
+        for value in values:
+            parameter = f"%{value}%" if SUMMARY_QUERIES[title].contains else value
+            expected = sorted(conn.execute(sql, (parameter,)).fetchall(), key=repr)
+            assert sorted(run_summary_query(conn, title, value), key=repr) == expected, (title, value)
+
+
+def test_queries_without_summary_tables_match_the_templates(conn):
+    assert_same_as_templates(conn)
+
+
+def test_queries_on_summary_tables_match_the_templates(conn):
+    assert len(build_summary_tables(conn, verbose=False)) == len(SEARCHES)
+    assert_same_as_templates(conn)
+
+
+def test_quiet_build_prints_nothing(conn, capsys):
+    build_summary_tables(conn, verbose=False)
+    assert capsys.readouterr().out == ""
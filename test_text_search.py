@@ -0,0 +1,36 @@
+import sqlite3
+
+import pytest
+
+from text_search import search_text
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE scripts (Name TEXT, Code TEXT)")
+    conn.executemany("INSERT INTO scripts VALUES (?, ?)", [("load_sales", "select 1"), ("report", "load_sales()")])
+    try:
+        conn.execute("CREATE VIRTUAL TABLE scripts_fts USING fts5(Code, content='scripts', tokenize='trigram')")
+    except sqlite3.OperationalError:
+        pytest.skip("FTS5 trigram tokenizer not available")
+    conn.execute("INSERT INTO scripts_fts (scripts_fts) VALUES ('rebuild')")
+    return conn
+
+
+def traced_search(conn, column, text):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    rows = search_text(conn, "scripts", column, text)
+    conn.set_trace_callback(None)
+    return rows, any("scripts_fts WHERE" in statement for statement in statements)
+
+
+def test_indexed_column_uses_the_full_text_index(conn):
+    assert traced_search(conn, "Code", "sales") == ([("report", "load_sales()")], True)
+
+
+def test_other_columns_scan_the_table(conn):
+    # Name would silently resolve to the outer table inside the full-text subquery
+    assert traced_search(conn, "Name", "sales") == ([("load_sales", "select 1")], False)
+    assert traced_search(conn, "Code", "sa") == ([("report", "load_sales()")], False)
@@ -0,0 +1,46 @@
+import json
+import zipfile
+
+from zip_source import ZipJsonSource
+
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as zip_file:
+        for name, data in members.items():
+            zip_file.writestr(name, json.dumps(data))
+    return path
+
+
+def read_member(source, json_filename):
+    with source.open(json_filename) as f:
+        return json.load(f)
+
+
+def test_shallowest_member_wins(tmp_path):
+    zip_path = write_zip(tmp_path / "tenant.zip", {
+        "export/config.json/backup/modules.json": ["backup"],
+        "export/config.json/modules.json": ["current"],
+        "export/config.json/old/deeper/modules.json": ["old"],
+    })
+    with ZipJsonSource(zip_path) as source:
+        assert source.members["modules.json"].filename == "export/config.json/modules.json"
+        assert read_member(source, "modules.json") == ["current"]
+
+
+def test_macos_metadata_is_skipped(tmp_path):
+    # The resource fork sits closer to the root than the real file
+    zip_path = write_zip(tmp_path / "tenant.zip", {
+        "__MACOSX/modules.json": "resource fork",
+        "tenant/config.json/modules.json": ["real"],
+    })
+    with ZipJsonSource(zip_path) as source:
+        assert source.find_json_files(["modules.json"]) == ["modules.json"]
+        assert read_member(source, "modules.json") == ["real"]
+
+
+def test_members_at_the_archive_root(tmp_path):
+    zip_path = write_zip(tmp_path / "tenant.zip", {"modules.json": ["root"], "workspaces.json": []})
+    with ZipJsonSource(zip_path) as source:
+        assert source.find_json_files(["modules.json", "workspaces.json", "measures.json"]) == [
+            "modules.json", "workspaces.json"]
+        assert read_member(source, "modules.json") == ["root"]
@@ -0,0 +1,24 @@
+import sqlite3
+from typing import Any, List, Tuple
+
+
+def _fts_columns(conn: sqlite3.Connection, fts_table: str) -> List[str]:
+    """Columns covered by a full-text index, empty when there is none."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({fts_table})")]
+
+
+def search_text(conn: sqlite3.Connection, table_name: str, column: str, text: str) -> List[Tuple[Any, ...]]:
+    """Find rows whose column contains text, the same as LIKE '%text%'.
+
+    Uses the <table>_fts trigram index built at import time when it covers the column. Trigrams
+    need at least 3 characters, shorter searches and other columns fall back to scanning the table.
+    """
+    fts_table = f"{table_name}_fts"
+    if len(text) >= 3 and column in _fts_columns(conn, fts_table):
+        sql = f"""
+            SELECT * FROM {table_name}
+            WHERE rowid IN (SELECT rowid FROM {fts_table} WHERE {column} LIKE ?)
+        """
+    else:
+        sql = f"SELECT * FROM {table_name} WHERE {column} LIKE ?"
+    return conn.execute(sql, (f"%{text}%",)).fetchall()
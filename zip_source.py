@@ -0,0 +1,65 @@
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Dict, List, Tuple
+
+# Entity definitions shipped with every tenant export
+SCHEMA_FILE = "_schema.json"
+
+# File whose modules table provides the ModuleId -> ModuleName lookup
+MODULES_FILE = "modules.json"
+
+
+class ZipJsonSource:
+    """Read configured JSON files directly from a ZIP archive without extracting it."""
+
+    def __init__(self, zip_path: Path):
+        try:
+            self.zip_file = zipfile.ZipFile(zip_path, 'r')
+        except Exception as e:
+            raise Exception(f"Failed to open ZIP file: {e}")
+        self.members = self._index_members()
+
+    def _index_members(self) -> Dict[str, zipfile.ZipInfo]:
+        """Map file names to archive members, also for members nested under a folder prefix."""
+        members = {}
+        for info in self.zip_file.infolist():
+            if info.is_dir():
+                continue
+            path = PurePosixPath(info.filename)
+            if path.parts[0] == "__MACOSX":
+                continue
+
+            # Prefer the member closest to the archive root when a name occurs more than once
+            existing = members.get(path.name)
+            if existing is None or len(PurePosixPath(existing.filename).parts) > len(path.parts):
+                members[path.name] = info
+        return members
+
+    def find_json_files(self, supported_files: List[str]) -> List[str]:
+        """Find supported JSON files in the archive."""
+        found_files = []
+        for json_filename in supported_files:
+            if json_filename in self.members:
+                found_files.append(json_filename)
+                print(f"Found file: {self.members[json_filename].filename}")
+            else:
+                print(f"File not found: {json_filename}")
+        return found_files
+
+    def open(self, json_filename: str) -> BinaryIO:
+        """Open a JSON file as a binary stream decompressed from the archive."""
+        return self.zip_file.open(self.members[json_filename], 'r')
+
+    def get_signature(self, json_filename: str) -> Tuple[str, int]:
+        """Get content hash and size of a JSON file from the archive directory, without reading it."""
+        info = self.members[json_filename]
+        return f"{info.CRC:08x}", info.file_size
+
+    def close(self):
+        self.zip_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()